@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+from collections import defaultdict
+
+import numpy as np
+
+from fixture_pipeline import AVERAGE_ENTRY
+from logger import Logger
+
+log = Logger.getInstance().getLogger()
+
+# The league average opponent is stored under this entry id.
+AVERAGE_ID = -1
+FIXTURE_COLUMNS = ("event", "entry_1", "entry_2", "points_1", "points_2")
+STANDING_COLUMNS = ("event", "entry", "rank", "h2h_points", "total_points")
+ENTRIES_FILE = "entries.json"
+
+
+def entry_id(entry):
+    return AVERAGE_ID if entry == AVERAGE_ENTRY else int(entry)
+
+
+class HistoryArchive:
+    """
+    Multi-season H2H history stored as one .npy file per column.
+
+    Layout: <path>/<season>/{fixtures,standings}_<column>.npy plus an
+    entries.json of entry id -> manager name. Columns are opened with
+    mmap_mode="r", so queries only page in what they touch. Entry ids change
+    every season, so queries take manager names.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    # ------------------ Storage ------------------
+
+    def seasons(self):
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(
+            season
+            for season in os.listdir(self.path)
+            if os.path.isdir(os.path.join(self.path, season))
+        )
+
+    def column_path(self, season, table, column):
+        return os.path.join(self.path, season, f"{table}_{column}.npy")
+
+    def load(self, season, table, columns):
+        data = {}
+        for column in columns:
+            fname = self.column_path(season, table, column)
+            if not os.path.exists(fname):
+                return {c: np.empty(0, dtype=np.int32) for c in columns}
+            data[column] = np.load(fname, mmap_mode="r")
+        return data
+
+    def fixtures(self, season):
+        return self.load(season, "fixtures", FIXTURE_COLUMNS)
+
+    def standings(self, season):
+        return self.load(season, "standings", STANDING_COLUMNS)
+
+    def entries(self, season):
+        fname = os.path.join(self.path, season, ENTRIES_FILE)
+        if not os.path.exists(fname):
+            return {}
+        with open(fname, encoding="UTF-8") as file:
+            return {int(k): v for k, v in json.load(file).items()}
+
+    def last_event(self, season):
+        events = self.fixtures(season)["event"]
+        return int(events.max()) if len(events) else 0
+
+    def write(self, season, table, columns, rows):
+        """
+        Replace any rows for the events in `rows` and rewrite each column.
+        """
+        existing = self.load(season, table, columns)
+        new = {
+            column: np.array([row[i] for row in rows], dtype=np.int32)
+            for i, column in enumerate(columns)
+        }
+        keep = ~np.isin(existing["event"], new["event"])
+        os.makedirs(os.path.join(self.path, season), exist_ok=True)
+        for column in columns:
+            values = np.concatenate([existing[column][keep], new[column]])
+            fname = self.column_path(season, table, column)
+            tmp = fname + ".tmp.npy"
+            np.save(tmp, values)
+            os.replace(tmp, fname)
+
+    def archive_gameweeks(self, season, fixture_map, player_map, weeks):
+        """
+        Append fixtures and standings for `weeks` of `fixture_map`; weeks the
+        league did not play (e.g. before it started) are skipped.
+        """
+        weeks = [week for week in weeks if week in fixture_map]
+        if not weeks:
+            return
+        fixture_rows = [
+            (
+                week,
+                entry_id(f.entry_1.entry),
+                entry_id(f.entry_2.entry),
+                f.entry_1.points,
+                f.entry_2.points,
+            )
+            for week in weeks
+            for f in fixture_map[week]
+        ]
+        standing_rows = [
+            (week, entry_id(entry), rank, h2h_points, total_points)
+            for week in weeks
+            for rank, (entry, h2h_points, total_points) in enumerate(
+                standings_at(fixture_map, week), start=1
+            )
+        ]
+        self.write(season, "fixtures", FIXTURE_COLUMNS, fixture_rows)
+        self.write(season, "standings", STANDING_COLUMNS, standing_rows)
+
+        entries = self.entries(season)
+        entries.update({entry_id(e): p.get_name() for e, p in player_map.items()})
+        fname = os.path.join(self.path, season, ENTRIES_FILE)
+        with open(fname, "w", encoding="UTF-8") as file:
+            json.dump(entries, file, indent=2)
+        log.info(f"Archived season {season} gameweeks {weeks[0]}-{weeks[-1]}")
+
+    # ------------------ Queries ------------------
+
+    def ids_for(self, season, name):
+        return [e for e, n in self.entries(season).items() if n == name]
+
+    def head_to_head(self, name_a, name_b):
+        """
+        (wins, draws, losses, points for, points against) of A against B.
+        """
+        record = np.zeros(5, dtype=np.int64)
+        for season in self.seasons():
+            a, b = self.ids_for(season, name_a), self.ids_for(season, name_b)
+            if not a or not b:
+                continue
+            f = self.fixtures(season)
+            for side_a, side_b, pts_a, pts_b in (
+                ("entry_1", "entry_2", "points_1", "points_2"),
+                ("entry_2", "entry_1", "points_2", "points_1"),
+            ):
+                mask = np.isin(f[side_a], a) & np.isin(f[side_b], b)
+                pa, pb = f[pts_a][mask], f[pts_b][mask]
+                record += [
+                    (pa > pb).sum(),
+                    (pa == pb).sum(),
+                    (pa < pb).sum(),
+                    pa.sum(),
+                    pb.sum(),
+                ]
+        return tuple(int(v) for v in record)
+
+    def all_time_table(self):
+        """
+        [(name, wins, draws, losses, h2h points, total points)] best first.
+        """
+        totals = defaultdict(lambda: np.zeros(4, dtype=np.int64))
+        for season in self.seasons():
+            f = self.fixtures(season)
+            if not len(f["event"]):
+                continue
+            ids, inverse = np.unique(
+                np.concatenate([f["entry_1"], f["entry_2"]]), return_inverse=True
+            )
+            mine = np.concatenate([f["points_1"], f["points_2"]])
+            theirs = np.concatenate([f["points_2"], f["points_1"]])
+            size = len(ids)
+            season_totals = np.stack(
+                [
+                    np.bincount(inverse, weights=mine > theirs, minlength=size),
+                    np.bincount(inverse, weights=mine == theirs, minlength=size),
+                    np.bincount(inverse, weights=mine < theirs, minlength=size),
+                    np.bincount(inverse, weights=mine, minlength=size),
+                ],
+                axis=1,
+            ).astype(np.int64)
+            names = self.entries(season)
+            for i, entry in enumerate(ids):
+                totals[names.get(int(entry), AVERAGE_ENTRY)] += season_totals[i]
+
+        table = []
+        for name, (w, d, l, points) in totals.items():
+            table.append((name, int(w), int(d), int(l), int(w * 3 + d), int(points)))
+        return sorted(table, key=lambda row: (row[4], row[5]), reverse=True)
+
+    def streaks(self, name):
+        """
+        Longest win, unbeaten and losing streaks across every season.
+        """
+        outcomes = []
+        for season in self.seasons():
+            ids = self.ids_for(season, name)
+            if not ids:
+                continue
+            f = self.fixtures(season)
+            home = np.isin(f["entry_1"], ids)
+            away = np.isin(f["entry_2"], ids)
+            mask = home | away
+            mine = np.where(home, f["points_1"], f["points_2"])[mask]
+            theirs = np.where(home, f["points_2"], f["points_1"])[mask]
+            order = np.argsort(f["event"][mask], kind="stable")
+            outcomes.append(np.sign(mine[order] - theirs[order]))
+        results = np.concatenate(outcomes) if outcomes else np.empty(0)
+        return {
+            "win": longest_run(results == 1),
+            "unbeaten": longest_run(results >= 0),
+            "loss": longest_run(results == -1),
+        }
+
+
+def longest_run(mask):
+    if not mask.any():
+        return 0
+    # Lengths of runs of True from the positions where the mask flips.
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.astype(np.int8), [0]))))
+    return int((edges[1::2] - edges[::2]).max())
+
+
+def standings_at(fixture_map, week):
+    """
+    [(entry, h2h points, total points)] ranked after `week`, ordered as
+    Leaderboard ranks players.
+    """
+    h2h_points = defaultdict(int)
+    total_points = defaultdict(int)
+    for event, fixtures in fixture_map.items():
+        if event > week:
+            continue
+        for fixture in fixtures:
+            for result in fixture.entries:
+                h2h_points[result.entry] += result.win * 3 + result.draw
+                total_points[result.entry] += result.points
+
+    ranked = sorted(h2h_points, key=lambda e: (-h2h_points[e], -total_points[e]))
+    return [(e, h2h_points[e], total_points[e]) for e in ranked]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="H2H history archive queries")
+    parser.add_argument("path", help="Archive directory")
+    parser.add_argument("--table", action="store_true", help="All-time table")
+    parser.add_argument("--h2h", nargs=2, metavar="NAME", help="Head-to-head record")
+    parser.add_argument("--streaks", metavar="NAME", help="Longest streaks")
+    args = parser.parse_args()
+
+    archive = HistoryArchive(args.path)
+    if args.table:
+        for rank, row in enumerate(archive.all_time_table(), start=1):
+            print(rank, *row, sep=",")
+    if args.h2h:
+        record = archive.head_to_head(*args.h2h)
+        print(dict(zip(("win", "draw", "loss", "for", "against"), record)))
+    if args.streaks:
+        print(archive.streaks(args.streaks))
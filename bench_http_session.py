@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+import time
+
+from aiohttp import web
+
+from http_session import FPLHttpSession
+
+
+async def start_server(port):
+    """
+    Local stand-in for the FPL API: a JSON endpoint with keep-alive.
+    """
+
+    async def handle(request):
+        return web.json_response({"page": request.query.get("page")})
+
+    app = web.Application()
+    app.router.add_get("/api", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+async def run_pooled(url, requests, concurrency):
+    # One FPLHttpSession for the whole run, as FPLSession uses it.
+    semaphore = asyncio.Semaphore(concurrency)
+    async with FPLHttpSession() as http:
+
+        async def fetch(page):
+            async with semaphore:
+                await http.get_json(f"{url}?page={page}")
+
+        await asyncio.gather(*(fetch(page) for page in range(requests)))
+    return http.connections_created, http.connections_reused
+
+
+async def run_unpooled(url, requests, concurrency):
+    # A new client per request, as each library call used to open its own.
+    semaphore = asyncio.Semaphore(concurrency)
+    created = reused = 0
+
+    async def fetch(page):
+        nonlocal created, reused
+        async with semaphore:
+            async with FPLHttpSession() as http:
+                await http.get_json(f"{url}?page={page}")
+            created += http.connections_created
+            reused += http.connections_reused
+
+    await asyncio.gather(*(fetch(page) for page in range(requests)))
+    return created, reused
+
+
+async def benchmark(url, requests, concurrency, port):
+    runner = None
+    if url is None:
+        runner = await start_server(port)
+        url = f"http://127.0.0.1:{port}/api"
+    try:
+        for name, run in (("unpooled", run_unpooled), ("pooled", run_pooled)):
+            start = time.perf_counter()
+            created, reused = await run(url, requests, concurrency)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{name:>8}: {requests} requests, {created} new connections "
+                f"(TLS handshakes on https), {reused} reused, {elapsed:.2f}s"
+            )
+    finally:
+        if runner is not None:
+            await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTTP connection pooling benchmark")
+    parser.add_argument(
+        "--url", default=None, help="JSON endpoint (default: a local server)"
+    )
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+    asyncio.run(benchmark(args.url, args.requests, args.concurrency, args.port))
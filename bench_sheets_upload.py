@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+import argparse
+import random
+import threading
+import time
+
+import google_sheets
+from google_sheets import GoogleSheets
+
+
+class FakeWorksheet:
+    title = "Rank"
+
+
+class FakeSpreadsheet:
+    """
+    Local stand-in for the Sheets values API: fixed latency per request,
+    bandwidth-bound payload time and random transient failures.
+    """
+
+    def __init__(self, latency, bandwidth, failure_rate, seed):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.rows_written = 0
+        self.requests = 0
+
+    def values_batch_update(self, body):
+        size = sum(
+            google_sheets.estimate_row_bytes(row)
+            for data in body["data"]
+            for row in data["values"]
+        )
+        time.sleep(self.latency + size / self.bandwidth)
+        with self.lock:
+            self.requests += 1
+            if self.random.random() < self.failure_rate:
+                raise ConnectionError("injected failure")
+            self.rows_written += sum(len(data["values"]) for data in body["data"])
+
+
+def benchmark(rows, latency, bandwidth, failure_rate, seed):
+    # The fake API has no quota; keep the write limiter out of the measurement.
+    google_sheets.WRITE_BUCKET.rate = google_sheets.WRITE_BUCKET.max_rate = 1e9
+    google_sheets.WRITE_BUCKET.capacity = 1e9
+
+    gsheets = GoogleSheets.__new__(GoogleSheets)
+    gsheets.sheet = FakeSpreadsheet(latency, bandwidth, failure_rate, seed)
+    gsheets.sheet_instance = FakeWorksheet()
+    table = [
+        [f"Team {i}", f"Player {i}", i % 38, 38 - i % 38, 0, (i % 38) * 3, i + 1]
+        for i in range(rows)
+    ]
+
+    start = time.perf_counter()
+    gsheets.write_rows("A2", table)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{rows} rows in {gsheets.sheet.requests} requests: "
+        f"{rows / elapsed:.0f} rows/s ({gsheets.sheet.rows_written} rows written)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chunked Sheets upload benchmark")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--bandwidth", type=float, default=2e6, help="bytes/s")
+    parser.add_argument("--failure-rate", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    benchmark(args.rows, args.latency, args.bandwidth, args.failure_rate, args.seed)
@@ -0,0 +1,127 @@
+import json
+import os
+from array import array
+
+from logger import Logger
+
+log = Logger.getInstance().getLogger()
+
+# Integer columns of a classic league standings row.
+COLUMNS = ("entry", "rank", "last_rank", "total", "event_total")
+NAMES_FILE = "names.jsonl"
+CHECKPOINT_FILE = "checkpoint.json"
+
+
+class ClassicLeagueStore:
+    """
+    Append-only, array-backed store of classic league standings.
+
+    Each integer column is a flat int32 file and names are one JSON line per
+    entry, so pages are written straight to disk as they arrive. The
+    checkpoint records the gameweek and the last page written, letting an
+    interrupted ingestion resume from the next one; a new gameweek starts
+    the standings over.
+    """
+
+    def __init__(self, path, league_id):
+        self.path = path
+        self.league_id = league_id
+        os.makedirs(path, exist_ok=True)
+        self.checkpoint = self.load_checkpoint()
+
+    # ------------------ Checkpoint ------------------
+
+    def load_checkpoint(self):
+        fname = os.path.join(self.path, CHECKPOINT_FILE)
+        if os.path.exists(fname):
+            with open(fname, encoding="UTF-8") as file:
+                checkpoint = json.load(file)
+            if checkpoint["league_id"] == self.league_id:
+                self.truncate(checkpoint["entries"])
+                return checkpoint
+        return self.reset(gameweek=None)
+
+    def reset(self, gameweek):
+        self.truncate(0)
+        self.checkpoint = {
+            "league_id": self.league_id,
+            "gameweek": gameweek,
+            "page": 0,
+            "entries": 0,
+            "done": False,
+        }
+        return self.checkpoint
+
+    def start_gameweek(self, gameweek):
+        """
+        Keep the checkpoint if it is for `gameweek`, otherwise start over.
+        """
+        if self.checkpoint.get("gameweek") != gameweek:
+            log.info(f"Classic league {self.league_id}: new gameweek {gameweek}")
+            self.reset(gameweek)
+            self.save_checkpoint()
+
+    def save_checkpoint(self):
+        fname = os.path.join(self.path, CHECKPOINT_FILE)
+        with open(fname + ".tmp", "w", encoding="UTF-8") as file:
+            json.dump(self.checkpoint, file)
+        os.replace(fname + ".tmp", fname)
+
+    def truncate(self, entries):
+        """
+        Drop rows written after the last checkpoint (e.g. a page cut short).
+        """
+        for column in COLUMNS:
+            fname = self.column_path(column)
+            with open(fname, "ab") as file:
+                file.truncate(entries * array("i").itemsize)
+        names = os.path.join(self.path, NAMES_FILE)
+        lines = []
+        if os.path.exists(names):
+            with open(names, encoding="UTF-8") as file:
+                lines = file.readlines()[:entries]
+        with open(names, "w", encoding="UTF-8") as file:
+            file.writelines(lines)
+
+    # ------------------ Rows ------------------
+
+    def column_path(self, column):
+        return os.path.join(self.path, f"{column}.i32")
+
+    def gameweek(self):
+        return self.checkpoint.get("gameweek")
+
+    def next_page(self):
+        return self.checkpoint["page"] + 1
+
+    def is_done(self):
+        return self.checkpoint["done"]
+
+    def append_page(self, page, data):
+        results = data["results"]
+        for column in COLUMNS:
+            with open(self.column_path(column), "ab") as file:
+                array("i", (row[column] or 0 for row in results)).tofile(file)
+        with open(os.path.join(self.path, NAMES_FILE), "a", encoding="UTF-8") as file:
+            for row in results:
+                file.write(json.dumps([row["entry_name"], row["player_name"]]) + "\n")
+
+        self.checkpoint["page"] = page
+        self.checkpoint["entries"] += len(results)
+        self.checkpoint["done"] = not data["has_next"]
+        self.save_checkpoint()
+        return len(results)
+
+    def column(self, column):
+        values = array("i")
+        with open(self.column_path(column), "rb") as file:
+            values.frombytes(file.read())
+        return values
+
+    def names(self):
+        with open(os.path.join(self.path, NAMES_FILE), encoding="UTF-8") as file:
+            for line in file:
+                yield tuple(json.loads(line))
+
+    def __len__(self):
+        return self.checkpoint["entries"]
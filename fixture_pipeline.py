@@ -0,0 +1,149 @@
+from typing import NamedTuple, Optional, Union
+
+from logger import Logger
+
+log = Logger.getInstance().getLogger()
+
+# Entry id used for the league average opponent in odd-sized leagues.
+AVERAGE_ENTRY = "AVERAGE"
+
+
+class InvalidFixtureError(ValueError):
+    """
+    Fixture that cannot be turned into a result.
+    """
+
+
+class FixtureInProgressError(InvalidFixtureError):
+    """
+    Fixture whose result has not been settled yet.
+    """
+
+
+class EntryResult(NamedTuple):
+    """
+    One side of a Head-to-Head fixture.
+    """
+
+    entry: Union[int, str]
+    name: str
+    player_name: str
+    points: int
+    win: int
+    draw: int
+    loss: int
+
+
+class H2HFixture(NamedTuple):
+    """
+    Normalized Head-to-Head fixture, independent of how it was retrieved.
+    """
+
+    id: int
+    event: int
+    entry_1: EntryResult
+    entry_2: EntryResult
+    is_knockout: bool = False
+    knockout_name: str = ""
+    winner: Optional[int] = None
+
+    @property
+    def entries(self):
+        return (self.entry_1, self.entry_2)
+
+
+# ------------------ Pipeline Stages ------------------
+
+
+def is_complete(fixture):
+    """
+    A raw fixture is complete once both entries have an outcome.
+    """
+    return all(
+        fixture[f"{entry}_win"] or fixture[f"{entry}_loss"] or fixture[f"{entry}_draw"]
+        for entry in ("entry_1", "entry_2")
+    )
+
+
+async def validate(fixtures):
+    """
+    Pair every raw fixture with whether its result is settled.
+    """
+    async for fixture in fixtures:
+        yield fixture, is_complete(fixture)
+
+
+async def repair_from_points(fixtures, can_repair):
+    """
+    Derive win/loss/draw from points for unsettled fixtures.
+
+    `can_repair` is only called for the first unsettled fixture, and decides
+    whether points can be trusted (i.e. the gameweek data is checked).
+    """
+    allowed = None
+    async for fixture, complete in fixtures:
+        if complete:
+            yield fixture
+            continue
+
+        if allowed is None:
+            allowed = can_repair()
+        if not allowed:
+            raise FixtureInProgressError(
+                f"Match week {fixture['event']} still in progress. "
+                f"{fixture['entry_1_name']} vs {fixture['entry_2_name']}"
+            )
+
+        p1, p2 = fixture["entry_1_points"], fixture["entry_2_points"]
+        if p1 == 0 or p2 == 0:
+            raise InvalidFixtureError(f"Invalid H2H league fixture: {fixture}")
+
+        log.debug(f"Repairing fixture {fixture.get('id')} from points")
+        outcome = {
+            "entry_1_win": int(p1 > p2),
+            "entry_1_loss": int(p1 < p2),
+            "entry_1_draw": int(p1 == p2),
+            "entry_2_win": int(p2 > p1),
+            "entry_2_loss": int(p2 < p1),
+            "entry_2_draw": int(p1 == p2),
+        }
+        yield {**fixture, **outcome}
+
+
+def normalize_entry(fixture, entry):
+    return EntryResult(
+        entry=fixture.get(f"{entry}_entry") or AVERAGE_ENTRY,
+        name=fixture[f"{entry}_name"],
+        player_name=fixture[f"{entry}_player_name"],
+        points=fixture[f"{entry}_points"],
+        win=fixture[f"{entry}_win"],
+        draw=fixture[f"{entry}_draw"],
+        loss=fixture[f"{entry}_loss"],
+    )
+
+
+def normalize_fixture(fixture):
+    return H2HFixture(
+        id=fixture.get("id"),
+        event=fixture["event"],
+        entry_1=normalize_entry(fixture, "entry_1"),
+        entry_2=normalize_entry(fixture, "entry_2"),
+        is_knockout=bool(fixture.get("is_knockout")),
+        knockout_name=fixture.get("knockout_name") or "",
+        winner=fixture.get("winner"),
+    )
+
+
+async def normalize(fixtures):
+    async for fixture in fixtures:
+        yield normalize_fixture(fixture)
+
+
+def fixture_pipeline(source, can_repair):
+    """
+    fetch -> validate -> repair-from-points -> normalize.
+
+    `source` is an async iterable of raw API fixtures; the result is an
+    async generator of H2HFixture records.
+    """
+    return normalize(repair_from_points(validate(source), can_repair))
@@ -1,31 +1,108 @@
 #!/usr/bin/env python3
 
 import argparse
-import heapq
 import json
+import multiprocessing
 import os
 import sys
+import threading
+import time
+from itertools import chain
 
 from gspread.cell import Cell
 
+from archive import HistoryArchive
+from classic_league import ClassicLeagueStore
+from fixture_pipeline import AVERAGE_ENTRY
 from fpl_player import FPLPlayer
-from fpl_session import FPLSession
+from fpl_session import API_THROTTLE, FPLSession, FPLSessionError
 from gcp_pubsub import GcpPubSubClient
 from google_sheets import GoogleSheets
-from heapnode import Node
+from knockout import KnockoutBracket
+from leaderboard import Leaderboard
+from live_scores import PicksCache
 from logger import Logger
+from picks_analytics import PicksAnalytics
+from projection import log_projection, project_season
+from run_state import RunState, content_hash
+from standings_server import StandingsCache, start_server
+from work_queue import Heartbeat, WorkQueue, worker_name
 
 log = Logger.getInstance().getLogger()
 
 # Debug flag to avoid writing to Google sheets for dev.
 UPDATE_GOOGLE_SHEETS = True
 
+# Seconds between FPL refreshes in --serve mode unless --poll is given.
+SERVE_REFRESH = 900
+
+
+class BackgroundInit:
+    """
+    Run a client factory in a daemon thread so it overlaps FPL fetching.
+
+    The factory is passed the `cancelled` event and must check it before
+    any side effect (e.g. writing a local cache), since the daemon thread
+    can be killed at exit once the result is abandoned.
+    """
+
+    def __init__(self, name, factory):
+        self.name = name
+        self.value = None
+        self.error = None
+        self.cancelled = threading.Event()
+        self.thread = threading.Thread(target=self.run, args=(factory,), daemon=True)
+        self.thread.start()
+
+    def run(self, factory):
+        try:
+            self.value = factory(self.cancelled)
+        except Exception as err:
+            self.error = err
+
+    def result(self):
+        self.thread.join()
+        if self.error is not None:
+            log.error(f"Failed to initialize {self.name}")
+            raise self.error
+        return self.value
+
+    def cancel(self):
+        log.debug(f"Abandoning {self.name} initialization")
+        self.cancelled.set()
+
+
+def state_path(data, key, fname):
+    """
+    Config path for a local state file, defaulting to the gameweek db's folder.
+    """
+    return data.get(key, os.path.join(os.path.dirname(data["gameweekdb_path"]), fname))
+
+
+def create_google_sheets(data, cancelled=None):
+    return GoogleSheets(
+        creds_fname=data["creds_file"],
+        fname=data["google_sheets_file_name"],
+        key=data.get("google_sheets_key"),
+        cache_fname=state_path(data, "google_sheets_cache", "google_sheets_cache.json"),
+        cancelled=cancelled,
+    )
+
+
+def create_pubsub_client(data):
+    return GcpPubSubClient(
+        project_id=data["gcp"]["pubsub"]["project_id"],
+        topic_id=data["gcp"]["pubsub"]["topic_id"],
+    )
+
 
 def update_google_gameweek_sheet(gameweek, player_map, gsheets):
     """
     Update Head-to-Head player points on Google Sheets.
     """
     log.info(f"Updating gameweek {gameweek} points")
+    # Points live on the first worksheet; other updates select their own.
+    gsheets.update_worksheet_num(num=0)
 
     player_cells = []
     for player in player_map.values():
@@ -47,45 +124,273 @@ def update_google_gameweek_sheet(gameweek, player_map, gsheets):
     return True
 
 
-def get_player_rank_heap(player_map):
+def parse_week_range(text):
+    """
+    argparse type for "FROM..TO", "FROM..", "..TO" or "WEEK"; returns
+    (first, last) with None for an open end.
     """
-    Create a min-heap of players for ranking.
+    first, sep, last = text.partition("..")
+    try:
+        lo = int(first) if first else None
+        hi = int(last) if last else (None if sep else lo)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid gameweek range: '{text}'")
+    if lo is not None and hi is not None and lo > hi:
+        raise argparse.ArgumentTypeError(f"empty gameweek range: '{text}'")
+    return lo, hi
+
+
+def select_weeks(week_range, weeks):
     """
-    heap = []
+    Sorted weeks of `weeks` within a parse_week_range() range.
+    """
+    lo, hi = week_range
+    return [
+        week
+        for week in sorted(weeks)
+        if (lo is None or week >= lo) and (hi is None or week <= hi)
+    ]
+
+
+def column_runs(cells):
+    """
+    Group [(col, value)] sorted by column into [(first col, [values])] runs
+    of adjacent columns.
+    """
+    runs = []
+    for col, value in cells:
+        if runs and runs[-1][0] + len(runs[-1][1]) == col:
+            runs[-1][1].append(value)
+        else:
+            runs.append((col, [value]))
+    return runs
+
+
+def backfill_gameweek_sheet(weeks, player_map, gsheets, overwrite=False):
+    """
+    Write the players x gameweeks points matrix in one batch request.
+
+    The sheet is read once to locate every player's name cell (points for a
+    week go `week` columns to its right, as in update_google_gameweek_sheet).
+    Only blank cells are filled unless `overwrite` is set.
+    """
+    if not weeks:
+        log.info("No settled gameweeks to backfill")
+        return False
+    found, values = gsheets.find_players(p.get_name() for p in player_map.values())
+
+    runs = []
     for player in player_map.values():
-        heapq.heappush(heap, Node(player))
-    return heap
+        if player.get_name() not in found:
+            log.error(f"{player.get_name()} not found on the gameweek sheet")
+            continue
+        row, col = found[player.get_name()]
+        existing = values[row - 1] + [""] * (col + max(weeks))
+        cells = [
+            (col + week, player.get_points(week))
+            for week in weeks
+            if week in player.points and (overwrite or not existing[col + week - 1])
+        ]
+        runs.extend((row, start, run) for start, run in column_runs(cells))
+
+    log.info(f"Backfilling gameweeks {weeks[0]}-{weeks[-1]}: {len(runs)} row runs")
+    if UPDATE_GOOGLE_SHEETS:
+        gsheets.write_runs(runs)
+    else:
+        for run in runs:
+            log.info(run)
+    return True
 
 
 def create_players(h2h_league_fixtures):
     """
-    Create Head-to-Head league players from fixtures.
+    Create Head-to-Head league players from a stream of H2HFixture records.
     """
     player_map = {}
 
-    for week, fixtures in h2h_league_fixtures.items():
-        for fixture in fixtures:
-            e1_id = fixture.get("entry_1_entry") or "AVERAGE"
-            e2_id = fixture.get("entry_2_entry") or "AVERAGE"
-
-            if e1_id not in player_map:
-                player_map[e1_id] = FPLPlayer(
-                    id=e1_id,
-                    name=fixture["entry_1_player_name"],
-                    team_name=fixture["entry_1_name"],
+    for fixture in h2h_league_fixtures:
+        for result in fixture.entries:
+            player = player_map.get(result.entry)
+            if player is None:
+                player = player_map[result.entry] = FPLPlayer(
+                    id=result.entry,
+                    name=result.player_name,
+                    team_name=result.name,
                 )
+            player.populate_player_stats(fixture.event, result)
 
-            if e2_id not in player_map:
-                player_map[e2_id] = FPLPlayer(
-                    id=e2_id,
-                    name=fixture["entry_2_player_name"],
-                    team_name=fixture["entry_2_name"],
-                )
+    return player_map
 
-            player_map[e1_id].populate_player_stats(week, fixture, "entry_1")
-            player_map[e2_id].populate_player_stats(week, fixture, "entry_2")
 
-    return player_map
+def create_run_state(data):
+    # Dev runs that skip Google Sheets must not record deliveries.
+    if not UPDATE_GOOGLE_SHEETS:
+        return RunState()
+    return RunState(
+        state_path(data, "run_state_path", f"run_state_{data['h2h_league_id']}.json")
+    )
+
+
+def sinks_digest(fixtures, leaderboard):
+    """
+    Content hash of the fixtures and the standings computed from them.
+    """
+    standings = [
+        (p.get_id(), p.get_total_h2h_points(), p.get_total_points())
+        for p in leaderboard
+    ]
+    return content_hash(fixtures, standings)
+
+
+def update_rank_standings(
+    fpl_session,
+    leaderboard,
+    gsheets,
+    pubsub_client,
+    run_state,
+    digest,
+    provisional=False,
+):
+    """
+    Update the rank table on Google Sheets and publish the standings.
+    """
+    log.info(f"\n\nUpdating player rank {fpl_session.get_current_gameweek()}")
+    prefix = "live_" if provisional else ""
+
+    def update_rank_sheet():
+        gsheets.update_worksheet_num(num=1)
+        gsheets.update_rank_table(standings=leaderboard)
+
+    run_state.deliver(f"{prefix}rank_sheet", digest, update_rank_sheet)
+    run_state.deliver(
+        f"{prefix}pubsub",
+        digest,
+        pubsub_client.publish,
+        fpl_session,
+        leaderboard,
+        provisional=provisional,
+    )
+    return True
+
+
+def run_live_updates(args, data, fpl_session, gsheets, pubsub_client):
+    """
+    Publish provisional results for the in-progress gameweek, polling every
+    args.poll seconds until all of its matches have finished.
+    """
+    gameweek = fpl_session.get_current_gameweek()
+    picks_cache = PicksCache(
+        gameweek, fname=state_path(data, "live_picks_cache", "live_picks_cache.json")
+    )
+    run_state = create_run_state(data)
+    # Settled weeks are counted once; each poll re-records the live week.
+    leaderboard = Leaderboard(create_players(fpl_session.iter_h2h_league_fixtures()))
+    player_map = leaderboard.players
+
+    polls = fpl_session.iter_live_fixtures(picks_cache, args.poll)
+    for live_fixtures, finished in polls:
+        leaderboard.apply(live_fixtures)
+        fixtures = list(chain(fpl_session.iter_h2h_league_fixtures(), live_fixtures))
+        digest = sinks_digest(fixtures, leaderboard)
+        log.info(f"Provisional results for gameweek {gameweek}")
+
+        if args.gameweek:
+            run_state.deliver(
+                "live_gameweek_sheet",
+                digest,
+                update_google_gameweek_sheet,
+                gameweek,
+                player_map,
+                gsheets,
+            )
+        if args.rank:
+            update_rank_standings(
+                fpl_session,
+                leaderboard,
+                gsheets,
+                pubsub_client,
+                run_state,
+                digest,
+                provisional=True,
+            )
+
+
+def write_table(gsheets, title, rows):
+    """
+    Replace the worksheet `title` with `rows`, adding it sized to fit.
+    """
+    width = max((len(row) for row in rows), default=1)
+    gsheets.update_worksheet_title(title, rows=max(len(rows), 1), cols=width)
+    gsheets.replace_table(rows)
+
+
+def publish_picks_analytics(data, fpl_session, player_map, gsheets, pubsub_client):
+    """
+    Squad analytics for the current gameweek to Google Sheets and Pub/Sub.
+    """
+    gameweek = fpl_session.get_current_gameweek()
+    finalized = fpl_session.is_gameweek_data_checked()
+    picks_cache = PicksCache(
+        gameweek,
+        fname=os.path.join(
+            state_path(data, "picks_cache_path", "picks"), f"gw{gameweek}.json"
+        ),
+    )
+    entry_ids = [entry for entry in player_map if entry != AVERAGE_ENTRY]
+    live = fpl_session.get_gameweek_picks(picks_cache, entry_ids)
+    # Automatic substitutions only settle once the gameweek is finalized.
+    if finalized:
+        os.makedirs(os.path.dirname(picks_cache.fname), exist_ok=True)
+        picks_cache.save()
+
+    analytics = PicksAnalytics(player_map, picks_cache, live, finalized)
+    if UPDATE_GOOGLE_SHEETS:
+        title = data.get("analytics_worksheet", "Analytics")
+        write_table(gsheets, title, analytics.build_table())
+    message = analytics.build_message()
+    log.info(message)
+    pubsub_client.publish_message(data=message.encode("utf-8"))
+
+
+def update_knockout(data, fpl_session, player_map, gsheets, pubsub_client):
+    """
+    Advance the cup bracket by newly settled knockout gameweeks and publish it
+    to Google Sheets and Pub/Sub.
+    """
+    fname = None
+    # Dev runs that skip Google Sheets must not persist the bracket.
+    if UPDATE_GOOGLE_SHEETS:
+        fname = state_path(
+            data, "knockout_path", f"knockout_{data['h2h_league_id']}.json"
+        )
+    bracket = KnockoutBracket(fname)
+    _, fixture_map = fpl_session.fpl_get_h2h_league_fixtures()
+    played = bracket.apply(fixture_map, player_map)
+    bracket.mark_players(player_map)
+    if not played:
+        return False
+
+    if UPDATE_GOOGLE_SHEETS:
+        title = data.get("knockout_worksheet", "Knockout")
+        write_table(gsheets, title, bracket.build_table(player_map))
+    message = bracket.build_message(played, player_map)
+    log.info(message)
+    pubsub_client.publish_message(data=message.encode("utf-8"))
+    bracket.save()
+    return True
+
+
+def archive_history(path, fpl_session, player_map):
+    """
+    Append gameweeks not yet in the history archive.
+    """
+    archive = HistoryArchive(path)
+    season = fpl_session.get_season()
+    weeks = list(
+        range(archive.last_event(season) + 1, fpl_session.get_current_gameweek() + 1)
+    )
+    _, fixture_map = fpl_session.fpl_get_h2h_league_fixtures()
+    archive.archive_gameweeks(season, fixture_map, player_map, weeks)
 
 
 def should_update(fpl_session: FPLSession):
@@ -122,8 +427,77 @@ def main(argv):
     parser.add_argument(
         "-p", "--playerconfig", help="Player configuration", action="store_true"
     )
+    parser.add_argument(
+        "-l",
+        "--live",
+        help="Publish provisional results while the gameweek is in progress",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--poll", help="Live mode poll interval in seconds", type=int, default=0
+    )
+    parser.add_argument(
+        "--project",
+        help="Project final standings from N simulated seasons",
+        type=int,
+        default=0,
+    )
+    parser.add_argument(
+        "--seed", help="Random seed for --project", type=int, default=None
+    )
+    parser.add_argument(
+        "-a",
+        "--analytics",
+        help="Publish squad analytics for the current gameweek",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--classic",
+        help="Ingest the standings of a classic league",
+        type=int,
+        metavar="LEAGUE_ID",
+    )
+    parser.add_argument(
+        "--coordinator",
+        help="Queue one work item per configured league for the current gameweek",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--workers",
+        help="Run N worker processes leasing league work items from the queue",
+        type=int,
+        default=0,
+    )
+    parser.add_argument(
+        "--backfill",
+        help="Fill gameweek points missing from the sheet, for FROM..TO if given",
+        nargs="?",
+        const=(None, None),
+        type=parse_week_range,
+        metavar="FROM..TO",
+    )
+    parser.add_argument(
+        "--overwrite",
+        help="With --backfill, also rewrite points already on the sheet",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--serve",
+        help="Serve league standings as JSON over HTTP on PORT",
+        type=int,
+        metavar="PORT",
+    )
     parser.add_argument("-d", "--debug", help="Debug", action="store_true")
-    parser.set_defaults(gameweek=False, rank=False, playerconfig=False, debug=False)
+    parser.set_defaults(
+        gameweek=False,
+        rank=False,
+        playerconfig=False,
+        live=False,
+        analytics=False,
+        coordinator=False,
+        overwrite=False,
+        debug=False,
+    )
 
     args = parser.parse_args(argv[1:])
 
@@ -133,30 +507,94 @@ def main(argv):
     with open(args.config, encoding="UTF-8") as file:
         data = json.load(file)
 
-    creds_file = data["creds_file"]
-    gsheets_fname = data["google_sheets_file_name"]
+    try:
+        if args.serve:
+            run_server(args, data)
+        elif args.coordinator or args.workers:
+            run_queue(args, data)
+        else:
+            run_league(args, data)
+    except FPLSessionError as err:
+        log.error(str(err))
+        sys.exit(2)
+
+
+def run_league(args, data):
+    """
+    Run the requested updates for the H2H league described by `data`.
+
+    Returns False when the current gameweek was not ready to be processed.
+    """
+    # Classic standings are public; they need no login or H2H fixtures.
+    if args.classic:
+        store = ClassicLeagueStore(
+            state_path(data, "classic_league_path", f"classic_{args.classic}"),
+            args.classic,
+        )
+        FPLSession.ingest_classic_league(store)
+        return True
+
+    # Sink clients (OAuth, spreadsheet lookup, Pub/Sub) start up while the
+    # FPL session logs in and fetches fixtures, in the modes that publish.
+    os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = data["creds_file"]
+    sinks = []
+    if not args.project:
+        sinks = [
+            BackgroundInit("Google Sheets", lambda c: create_google_sheets(data, c)),
+            BackgroundInit("Pub/Sub", lambda c: create_pubsub_client(data)),
+        ]
 
     fpl_session = FPLSession(
-        h2h_league_id=data["h2h_league_id"], gameweeks_db=data["gameweekdb_path"]
+        h2h_league_id=data["h2h_league_id"],
+        gameweeks_db=data["gameweekdb_path"],
+        fetch_schedule=args.project > 0,
     )
 
+    if args.project:
+        player_map = create_players(fpl_session.iter_h2h_league_fixtures())
+        projection = project_season(
+            player_map,
+            fpl_session.h2h_league_schedule,
+            simulations=args.project,
+            seed=args.seed,
+        )
+        log_projection(player_map, projection)
+        return True
+
+    if args.analytics:
+        player_map = create_players(fpl_session.iter_h2h_league_fixtures())
+        gsheets, pubsub_client = (sink.result() for sink in sinks)
+        publish_picks_analytics(data, fpl_session, player_map, gsheets, pubsub_client)
+        return True
+
+    if args.backfill:
+        player_map = create_players(fpl_session.iter_h2h_league_fixtures())
+        _, fixture_map = fpl_session.fpl_get_h2h_league_fixtures()
+        weeks = select_weeks(args.backfill, fixture_map)
+        gsheets = sinks[0].result()
+        sinks[1].cancel()
+        gsheets.update_worksheet_num(num=0)
+        backfill_gameweek_sheet(weeks, player_map, gsheets, overwrite=args.overwrite)
+        return True
+
     if not should_update(fpl_session):
+        if args.live and fpl_session.live_fixtures:
+            gsheets, pubsub_client = (sink.result() for sink in sinks)
+            run_live_updates(args, data, fpl_session, gsheets, pubsub_client)
+            return False
+        for sink in sinks:
+            sink.cancel()
         log.info("No update needed. Exiting...")
-        sys.exit(0)
+        # Already updated counts as done; a gameweek still in play does not.
+        return fpl_session.has_gameweek_been_updated()
 
     log.info("Current gameweek data is checked, updating Google Sheets")
-    os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = creds_file
+    gsheets, pubsub_client = (sink.result() for sink in sinks)
 
-    gsheets = GoogleSheets(creds_fname=creds_file, fname=gsheets_fname)
-    pubsub_client = GcpPubSubClient(
-        project_id=data["gcp"]["pubsub"]["project_id"],
-        topic_id=data["gcp"]["pubsub"]["topic_id"],
-    )
-
-    h2h_league, h2h_league_fixtures = fpl_session.fpl_get_h2h_league_fixtures()
+    h2h_league, _ = fpl_session.fpl_get_h2h_league_fixtures()
     log.info(f"{'Fantasy Premier League':30}: {h2h_league}")
 
-    player_map = create_players(h2h_league_fixtures)
+    player_map = create_players(fpl_session.iter_h2h_league_fixtures())
 
     log.info(f"Number of players: {len(player_map)}")
     for player in player_map.values():
@@ -164,19 +602,24 @@ def main(argv):
 
     gameweek_updated = False
     gameweek_rank_updated = False
+    run_state = create_run_state(data)
+    leaderboard = Leaderboard(player_map)
+    digest = sinks_digest(fpl_session.iter_h2h_league_fixtures(), leaderboard)
 
     if args.gameweek:
-        gameweek_updated = update_google_gameweek_sheet(
-            fpl_session.get_current_gameweek(), player_map, gsheets
+        gameweek_updated = run_state.deliver(
+            "gameweek_sheet",
+            digest,
+            update_google_gameweek_sheet,
+            fpl_session.get_current_gameweek(),
+            player_map,
+            gsheets,
         )
 
     if args.rank:
-        gsheets.update_worksheet_num(num=1)
-        log.info(f"\n\nUpdating player rank {fpl_session.get_current_gameweek()}")
-        heap = get_player_rank_heap(player_map)
-        gsheets.update_rank_table(heap=heap)
-        pubsub_client.publish(fpl_session, heap)
-        gameweek_rank_updated = True
+        gameweek_rank_updated = update_rank_standings(
+            fpl_session, leaderboard, gsheets, pubsub_client, run_state, digest
+        )
 
     if gameweek_updated and gameweek_rank_updated:
         log.info(
@@ -185,6 +628,129 @@ def main(argv):
         if UPDATE_GOOGLE_SHEETS:
             fpl_session.marked_gameweek_updated()
 
+    if any(f.is_knockout for f in fpl_session.iter_h2h_league_fixtures()):
+        update_knockout(data, fpl_session, player_map, gsheets, pubsub_client)
+
+    if "archive_path" in data:
+        archive_history(data["archive_path"], fpl_session, player_map)
+
+    return True
+
+
+def refresh_standings(data, cache):
+    """
+    Publish the latest settled standings to `cache`. Failures are logged and
+    the last snapshot keeps being served.
+    """
+    try:
+        fpl_session = FPLSession(
+            h2h_league_id=data["h2h_league_id"],
+            gameweeks_db=data["gameweekdb_path"],
+        )
+    except (Exception, SystemExit) as err:
+        log.error(f"Standings refresh failed, serving the last snapshot: {err!r}")
+        return False
+
+    _, fixture_map = fpl_session.fpl_get_h2h_league_fixtures()
+    if not fixture_map:
+        log.info("No settled gameweeks yet, nothing to publish")
+        return False
+    player_map = create_players(fpl_session.iter_h2h_league_fixtures())
+    return cache.publish(max(fixture_map), Leaderboard(player_map))
+
+
+def run_server(args, data):
+    """
+    Serve the league standings, refreshing them from FPL every poll interval.
+
+    The cached responses are only rebuilt once a new gameweek has been
+    processed, so clients keep getting the same ETags in between.
+    """
+    cache = StandingsCache()
+    server = start_server(cache, port=args.serve)
+    try:
+        while True:
+            refresh_standings(data, cache)
+            time.sleep(args.poll or SERVE_REFRESH)
+    except KeyboardInterrupt:
+        log.info("Stopping standings server")
+    finally:
+        server.shutdown()
+
+
+def league_configs(data):
+    """
+    Per-league configs: entries of "leagues" override the top-level config.
+    """
+    return {
+        league["h2h_league_id"]: {**data, **league}
+        for league in data.get("leagues", [data])
+    }
+
+
+def run_worker(args, data, queue_path):
+    """
+    Lease (league, gameweek) items until the queue has nothing visible.
+
+    Items whose gameweek was not ready are deferred rather than finished, so
+    a later worker run processes them once the data is checked.
+    """
+    # Each process has its own copy of the throttle; split the FPL budget.
+    API_THROTTLE.bucket.scale(1 / max(1, args.workers))
+    queue = WorkQueue(queue_path)
+    leagues = league_configs(data)
+    worker = worker_name()
+
+    while True:
+        item = queue.lease(worker)
+        if item is None:
+            log.info(f"Worker {worker}: no more work")
+            return
+        item_id, league_id, gameweek = item
+        log.info(f"Worker {worker}: league {league_id} gameweek {gameweek}")
+
+        heartbeat = Heartbeat(queue, item_id, worker)
+        error = None
+        delivered = True
+        try:
+            delivered = run_league(args, leagues[league_id])
+        except SystemExit as err:
+            if err.code:
+                error = f"exit code {err.code}"
+        except Exception as err:
+            log.exception(f"League {league_id} failed")
+            error = repr(err)
+        finally:
+            heartbeat.stop()
+        if error is None and not delivered:
+            log.info(f"League {league_id} gameweek {gameweek} not ready, deferring")
+            queue.defer(item_id, worker)
+        else:
+            queue.finish(item_id, worker, error)
+
+
+def run_queue(args, data):
+    """
+    Coordinator: queue one item per league for the current gameweek.
+    Workers: run args.workers processes draining the queue.
+    """
+    queue_path = state_path(data, "work_queue_path", "work_queue.db")
+
+    if args.coordinator:
+        queue = WorkQueue(queue_path)
+        gameweek = FPLSession.fetch_current_gameweek()
+        for league_id in league_configs(data):
+            queue.enqueue(league_id, gameweek)
+
+    workers = [
+        multiprocessing.Process(target=run_worker, args=(args, data, queue_path))
+        for _ in range(args.workers)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
 
 if __name__ == "__main__":
     main(sys.argv)
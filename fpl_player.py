@@ -25,21 +25,16 @@ class FPLPlayer:
         self.is_knockout = False
         self.winner = None
 
-    def populate_player_stats(self, week, h2h_fixture, entry):
-        if week not in self.win:
-            self.win[week] = 0
-        if week not in self.draw:
-            self.draw[week] = 0
-        if week not in self.loss:
-            self.loss[week] = 0
-        if week not in self.points:
-            self.points[week] = 0
-
-        self.win[week] = h2h_fixture[entry + "_win"]
-        self.draw[week] = h2h_fixture[entry + "_draw"]
-        self.loss[week] = h2h_fixture[entry + "_loss"]
-        self.points[week] = h2h_fixture[entry + "_points"]
-        self.total_points += self.points[week]
+    def populate_player_stats(self, week, result):
+        """
+        Record one gameweek from this player's EntryResult.
+        """
+        self.win[week] = result.win
+        self.draw[week] = result.draw
+        self.loss[week] = result.loss
+        # Re-recording a week (e.g. live provisional results) replaces it.
+        self.total_points += result.points - self.points.get(week, 0)
+        self.points[week] = result.points
 
     def get_id(self):
         return self.id
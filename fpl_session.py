@@ -1,38 +1,143 @@
 import asyncio
 import os
 import sys
+import time
+from contextlib import aclosing
 from pathlib import Path
 
+from fixture_pipeline import (AVERAGE_ENTRY, FixtureInProgressError,
+                              InvalidFixtureError, fixture_pipeline)
 from fpl import FPL
+from http_session import FPLHttpSession
+from live_scores import LiveGameweek, provisional_fixtures
 from logger import Logger
+from rate_limiter import FPLApiError, FPLApiThrottle
 
 log = Logger.getInstance().getLogger()
 
+# Shared by every FPLSession in the process so that all API calls are
+# rate limited against the same budget.
+API_THROTTLE = FPLApiThrottle()
+
+H2H_FIXTURES_URL = (
+    "https://fantasy.premierleague.com/api/leagues-h2h-matches/league/{}/?page={}"
+)
+# Number of fixture pages requested ahead of the one being consumed.
+FIXTURE_PAGE_CONCURRENCY = 4
+
+BOOTSTRAP_URL = "https://fantasy.premierleague.com/api/bootstrap-static/"
+EVENT_LIVE_URL = "https://fantasy.premierleague.com/api/event/{}/live/"
+EVENT_FIXTURES_URL = "https://fantasy.premierleague.com/api/fixtures/?event={}"
+ENTRY_PICKS_URL = "https://fantasy.premierleague.com/api/entry/{}/event/{}/picks/"
+CLASSIC_STANDINGS_URL = (
+    "https://fantasy.premierleague.com/api/leagues-classic/{}/standings/"
+    "?page_standings={}"
+)
+CLASSIC_PAGE_CONCURRENCY = 8
+
+
+class FPLSessionError(Exception):
+    """
+    The league's FPL data cannot be loaded (invalid or missing fixtures,
+    inconsistent gameweeks).
+    """
+
 
 class FPLSession:
     """
     Wrapper class for an FPL session.
     """
 
-    def __init__(self, h2h_league_id, gameweeks_db="gameweek.db"):
+    def __init__(
+        self,
+        h2h_league_id,
+        gameweeks_db="gameweek.db",
+        api=None,
+        http=None,
+        fetch_schedule=False,
+    ):
+        self._setup(h2h_league_id, gameweeks_db, api, http, fetch_schedule)
+        try:
+            asyncio.run(self.fpl_run_once(self.fpl_get_session))
+        except FPLSessionError as err:
+            log.error(str(err))
+            sys.exit(2)
+
+    @classmethod
+    async def create(
+        cls,
+        h2h_league_id,
+        gameweeks_db="gameweek.db",
+        api=None,
+        http=None,
+        fetch_schedule=False,
+    ):
+        """
+        Build a session on the running event loop.
+
+        The HTTP session stays open for further async calls; use the result
+        as an async context manager to close it (if owned) when done.
+        Sessions sharing one `http` can be created concurrently. Raises
+        FPLSessionError where the sync constructor exits.
+        """
+        self = cls.__new__(cls)
+        self._setup(h2h_league_id, gameweeks_db, api, http, fetch_schedule)
+        try:
+            await self.fpl_get_session()
+        except BaseException:
+            await self.aclose()
+            raise
+        return self
+
+    def _setup(self, h2h_league_id, gameweeks_db, api, http, fetch_schedule):
+        self.api = api or API_THROTTLE
+        # A caller-provided HTTP session is shared and closed by its owner.
+        self.owns_http = http is None
+        self.http = http or FPLHttpSession()
         self.fpl_session = None
         self.user = None
         self.h2h_league = None
-        self.h2h_league_fixtures = None
-        self.h2h_league_all_fixtures = []
         self.h2h_league_fixture_map = {}
+        # Raw fixtures of the current gameweek while it is in progress.
+        self.live_fixtures = []
+        # (event, entry_1, entry_2) of unplayed fixtures, if fetch_schedule.
+        self.fetch_schedule = fetch_schedule
+        self.h2h_league_schedule = []
         self.curr_gameweek = 0
         self.next_gameweek = 0
         self.h2h_league_id = h2h_league_id
         self.gameweeks_db = gameweeks_db
-        self.fpl_fixtures_retrieve_method = 1
         self.current_gameweek_data_valid = False
 
         Path(gameweeks_db).touch(exist_ok=True)
-        asyncio.run(self.fpl_get_session())
+
+    async def aclose(self):
+        if self.owns_http:
+            await self.http.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
 
     # ------------------ Gameweek Methods ------------------
 
+    @staticmethod
+    async def fpl_fetch_current_gameweek(api=None, http=None):
+        if http is None:
+            async with FPLHttpSession() as http:
+                return await FPLSession.fpl_fetch_current_gameweek(api, http)
+        bootstrap = await (api or API_THROTTLE).call(http.get_json, BOOTSTRAP_URL)
+        return next((e["id"] for e in bootstrap["events"] if e["is_current"]), 0)
+
+    @staticmethod
+    def fetch_current_gameweek():
+        """
+        Current gameweek from the public bootstrap data, without logging in.
+        """
+        return asyncio.run(FPLSession.fpl_fetch_current_gameweek())
+
     def get_current_gameweek(self):
         return self.curr_gameweek
 
@@ -46,11 +151,19 @@ class FPLSession:
                     log.info(f"Next gameweek: {gw.id}")
                     self.next_gameweek = gw.id
 
+    def get_season(self):
+        """
+        Season label such as "2025-26", from the first gameweek's deadline.
+        """
+        year = int(self.gameweeks[0].deadline_time[:4])
+        return f"{year}-{(year + 1) % 100:02d}"
+
     def is_gameweek_data_checked(self):
         gw_obj = self.gameweeks[self.curr_gameweek - 1]
         if gw_obj.id != self.curr_gameweek:
-            log.error(f"Wrong gameweek! {gw_obj.id} != {self.curr_gameweek}")
-            sys.exit(2)
+            raise FPLSessionError(
+                f"Wrong gameweek! {gw_obj.id} != {self.curr_gameweek}"
+            )
         return gw_obj.is_current and gw_obj.data_checked
 
     def is_current_gameweek_completed(self):
@@ -64,153 +177,310 @@ class FPLSession:
         with open(self.gameweeks_db, "a") as db:
             db.write(f"{self.curr_gameweek}\n")
 
-    # ------------------ Fixture Validation ------------------
+    # ------------------ Fixtures Retrieval Methods ------------------
 
-    def is_valid_gameweek_fixture(self, fixture):
-        entry_1_empty = (
-            fixture["entry_1_win"] == 0
-            and fixture["entry_1_loss"] == 0
-            and fixture["entry_1_draw"] == 0
-        )
-        entry_2_empty = (
-            fixture["entry_2_win"] == 0
-            and fixture["entry_2_loss"] == 0
-            and fixture["entry_2_draw"] == 0
-        )
-        if entry_1_empty or entry_2_empty:
-            log.info(
-                f"Match week {self.curr_gameweek} still in progress. "
-                f"{fixture['entry_1_name']} vs {fixture['entry_2_name']}"
-            )
-            return False
-        return True
+    async def fpl_get_fixture_page(self, page):
+        url = H2H_FIXTURES_URL.format(self.h2h_league_id, page)
+        try:
+            return await self.api.call(self.http.get_json, url)
+        except FPLApiError as err:
+            # Pages requested ahead of the last one do not exist.
+            if err.status == 404:
+                return {"has_next": False, "results": []}
+            raise
 
-    def is_valid_fixtures(self, fixtures):
-        if not fixtures:
-            log.error("Failed to retrieve H2H league fixture")
-            sys.exit(2)
-        return all(self.is_valid_gameweek_fixture(fixture) for fixture in fixtures)
+    async def fpl_stream_fixtures(
+        self, until=None, concurrency=FIXTURE_PAGE_CONCURRENCY
+    ):
+        """
+        Yield H2H league fixtures in page order, keeping up to `concurrency`
+        page requests in flight. Stops as soon as a fixture beyond gameweek
+        `until` is seen, cancelling any pages fetched ahead.
+        """
+        pending = {}
+        next_page = 1
+        try:
+            while True:
+                while len(pending) < concurrency:
+                    pending[next_page] = asyncio.ensure_future(
+                        self.fpl_get_fixture_page(next_page)
+                    )
+                    next_page += 1
 
-    # ------------------ Fixtures Retrieval Methods ------------------
+                data = await pending.pop(min(pending))
+                for fixture in data["results"]:
+                    if until is not None and fixture["event"] > until:
+                        return
+                    yield fixture
+                if not data["has_next"]:
+                    return
+        finally:
+            for task in pending.values():
+                task.cancel()
 
-    async def fpl_fixtures_info(self):
-        local_gameweek = 1
-        fixtures = await self.h2h_league.get_fixture(local_gameweek)
-        for fixture in fixtures:
-            home_team = fixture["entry_1_name"]
-            home_player = fixture["entry_1_player_name"]
-            away_team = fixture["entry_2_name"]
-            away_player = fixture["entry_2_player_name"]
-            print(f"{home_team},{home_player}")
-            print(f"{away_team},{away_player}")
-
-    async def fpl_get_fixtures(self):
-        all_fixtures = []
+    async def fpl_stream_gameweek_fixtures(self):
+        """
+        Yield fixtures one gameweek at a time through the fpl client.
+        """
         for gameweek in range(1, self.curr_gameweek + 1):
-            fixtures = await self.h2h_league.get_fixture(gameweek)
-            if not self.is_valid_fixtures(fixtures):
-                log.info(
-                    f"\nFailed to retrieve fixture data for gameweek {gameweek}, retry...\n"
-                )
-                fixtures = await self.h2h_league.get_fixture(f"{gameweek}&page=1")
-                if not self.is_valid_fixtures(fixtures):
-                    log.error("Invalid H2H league fixture")
-                    raise ValueError("Invalid H2H league fixtures")
-            all_fixtures.append(fixtures)
-        return all_fixtures
-
-    async def fpl_get_fixtures_2(self):
-        valid_fixtures = []
-        all_fixtures = await self.h2h_league.get_fixtures()
-        for fixture in all_fixtures:
+            fixtures = await self.api.call(self.h2h_league.get_fixture, gameweek)
+            for fixture in fixtures:
+                yield fixture
+
+    async def fpl_split_schedule(self, source):
+        """
+        Divert fixtures after the current gameweek into the schedule.
+        """
+        async for fixture in source:
             if fixture["event"] > self.curr_gameweek:
-                break
-            if not self.is_valid_gameweek_fixture(fixture):
-                log.error(f"Invalid fixture: {fixture}")
-                raise ValueError("Invalid H2H league fixtures")
-            valid_fixtures.append(fixture)
-        return valid_fixtures
-
-    async def fpl_get_fixtures_3(self):
-        all_fixtures = []
-        for gameweek in range(1, self.curr_gameweek + 1):
-            fixtures = await self.h2h_league.get_fixture(gameweek)
-            if not self.is_valid_fixtures(fixtures):
-                log.info(
-                    f"\nFailed to retrieve fixture data for gameweek {gameweek}, retry...\n"
-                )
-                for i, fixture in enumerate(fixtures):
-                    p1, p2 = fixture["entry_1_points"], fixture["entry_2_points"]
-                    if p1 == 0 or p2 == 0:
-                        log.error("Invalid H2H league fixture")
-                        sys.exit(2)
-                    if p1 > p2:
-                        (
-                            fixtures[i]["entry_1_win"],
-                            fixtures[i]["entry_1_total"],
-                            fixtures[i]["entry_2_loss"],
-                        ) = (1, 3, 1)
-                    elif p2 > p1:
-                        (
-                            fixtures[i]["entry_2_win"],
-                            fixtures[i]["entry_2_total"],
-                            fixtures[i]["entry_1_loss"],
-                        ) = (1, 3, 1)
-                    else:
-                        (
-                            fixtures[i]["entry_1_draw"],
-                            fixtures[i]["entry_2_draw"],
-                            fixtures[i]["entry_1_total"],
-                            fixtures[i]["entry_2_total"],
-                        ) = (1, 1, 1, 1)
-            all_fixtures.append(fixtures)
-        return all_fixtures
+                self.add_h2h_league_schedule(fixture)
+                continue
+            yield fixture
+
+    async def fpl_get_fixtures(self, source):
+        self.h2h_league_fixture_map = {}
+        self.h2h_league_schedule = []
+        # Close every stage on the way out, so an aborted pipeline cancels
+        # the pages still in flight now rather than at garbage collection.
+        async with aclosing(source), aclosing(self.fpl_split_schedule(source)) as split:
+            stream = fixture_pipeline(split, self.is_gameweek_data_checked)
+            async with aclosing(stream):
+                async for fixture in stream:
+                    self.add_h2h_league_fixture(fixture)
 
     # ------------------ H2H League Fixture Mapping ------------------
 
-    def build_h2h_league_fixture_map(self, fixtures):
-        for fixture in fixtures:
-            week = fixture["event"]
-            if week > self.curr_gameweek:
-                continue
-            self.h2h_league_fixture_map.setdefault(week, []).append(fixture)
+    def add_h2h_league_fixture(self, fixture):
+        if fixture.event > self.curr_gameweek:
+            return
+        self.h2h_league_fixture_map.setdefault(fixture.event, []).append(fixture)
 
-    def fpl_get_h2h_league_fixtures(self):
-        if self.fpl_fixtures_retrieve_method in (1, 3):
-            for fixtures in self.h2h_league_all_fixtures:
-                self.build_h2h_league_fixture_map(fixtures)
-        else:
-            self.build_h2h_league_fixture_map(self.h2h_league_all_fixtures)
+    def add_h2h_league_schedule(self, fixture):
+        self.h2h_league_schedule.append(
+            (
+                fixture["event"],
+                fixture["entry_1_entry"] or AVERAGE_ENTRY,
+                fixture["entry_2_entry"] or AVERAGE_ENTRY,
+            )
+        )
+
+    def iter_h2h_league_fixtures(self):
+        for week in sorted(self.h2h_league_fixture_map):
+            yield from self.h2h_league_fixture_map[week]
 
-        log.info(f"Build H2H league info method {self.fpl_fixtures_retrieve_method}")
+    def fpl_get_h2h_league_fixtures(self):
         return self.h2h_league, self.h2h_league_fixture_map
 
+    # ------------------ Live Gameweek ------------------
+
+    async def fpl_get_entry_picks(self, entry_id, gameweek):
+        url = ENTRY_PICKS_URL.format(entry_id, gameweek)
+        return entry_id, await self.api.call(self.http.get_json, url)
+
+    async def fpl_get_picks(self, picks_cache, entry_ids):
+        """
+        Fill `picks_cache` with element data and any entries' picks it lacks,
+        fetching the picks concurrently.
+        """
+        if not picks_cache.elements:
+            bootstrap = await self.api.call(self.http.get_json, BOOTSTRAP_URL)
+            picks_cache.set_elements(bootstrap["elements"])
+
+        missing = picks_cache.missing(entry_ids)
+        if missing:
+            log.info(f"Fetching picks for {len(missing)} entries")
+            for entry_id, data in await asyncio.gather(
+                *(self.fpl_get_entry_picks(e, picks_cache.gameweek) for e in missing)
+            ):
+                picks_cache.add_picks(entry_id, data)
+
+    async def fpl_get_live_scores(self, picks_cache):
+        """
+        Provisional scores for the current gameweek. Picks and element data
+        are fetched once per gameweek; each later poll only requests the
+        live feed and the gameweek's fixture status.
+        """
+        entry_ids = [
+            fixture[f"{entry}_entry"]
+            for fixture in self.live_fixtures
+            for entry in ("entry_1", "entry_2")
+            if fixture[f"{entry}_entry"]
+        ]
+        await self.fpl_get_picks(picks_cache, entry_ids)
+        picks_cache.save()
+
+        gameweek = self.curr_gameweek
+        live, fixtures = await asyncio.gather(
+            self.api.call(self.http.get_json, EVENT_LIVE_URL.format(gameweek)),
+            self.api.call(self.http.get_json, EVENT_FIXTURES_URL.format(gameweek)),
+        )
+        scores = LiveGameweek(picks_cache).scores(live, fixtures)
+        finished = all(fixture.get("finished_provisional") for fixture in fixtures)
+        return provisional_fixtures(gameweek, self.live_fixtures, scores), finished
+
+    def iter_live_fixtures(self, picks_cache, interval=0):
+        """
+        Yield (provisional fixtures, whether every match has finished) every
+        `interval` seconds until all matches have finished (once if 0).
+
+        Every poll runs on one event loop and HTTP session, so pooled
+        connections are reused across polls.
+        """
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self.http.open())
+            while True:
+                fixtures, finished = loop.run_until_complete(
+                    self.fpl_get_live_scores(picks_cache)
+                )
+                yield fixtures, finished
+                if finished or not interval:
+                    return
+                time.sleep(interval)
+        finally:
+            loop.run_until_complete(self.aclose())
+            loop.close()
+
+    async def fpl_get_gameweek_picks(self, picks_cache, entry_ids):
+        """
+        Picks of `entry_ids` and the gameweek's element points feed.
+        """
+        await self.fpl_get_picks(picks_cache, entry_ids)
+        url = EVENT_LIVE_URL.format(picks_cache.gameweek)
+        return await self.api.call(self.http.get_json, url)
+
+    def get_gameweek_picks(self, picks_cache, entry_ids):
+        return asyncio.run(
+            self.fpl_run_once(self.fpl_get_gameweek_picks, picks_cache, entry_ids)
+        )
+
+    # ------------------ Classic League Standings ------------------
+
+    # Public endpoints: ingestion runs on its own HTTP session, without the
+    # H2H login and fixture fetch.
+
+    @staticmethod
+    async def fpl_get_classic_page(http, api, league_id, page):
+        url = CLASSIC_STANDINGS_URL.format(league_id, page)
+        try:
+            data = await api.call(http.get_json, url)
+        except FPLApiError as err:
+            if err.status == 404:
+                return {"has_next": False, "results": []}
+            raise
+        return data["standings"]
+
+    @staticmethod
+    async def fpl_ingest_classic_league(
+        http, api, store, concurrency=CLASSIC_PAGE_CONCURRENCY
+    ):
+        """
+        Fetch classic league standings pages concurrently and append them to
+        `store` in page order, resuming after its last completed page of the
+        current gameweek.
+        """
+        store.start_gameweek(await FPLSession.fpl_fetch_current_gameweek(api, http))
+        if store.is_done():
+            log.info(
+                f"Classic league {store.league_id} already ingested "
+                f"for gameweek {store.gameweek()}"
+            )
+            return
+
+        start = time.perf_counter()
+        ingested = 0
+        pending = {}
+        next_page = store.next_page()
+        try:
+            while not store.is_done():
+                while len(pending) < concurrency:
+                    pending[next_page] = asyncio.ensure_future(
+                        FPLSession.fpl_get_classic_page(
+                            http, api, store.league_id, next_page
+                        )
+                    )
+                    next_page += 1
+
+                page = min(pending)
+                ingested += store.append_page(page, await pending.pop(page))
+                if page % 100 == 0:
+                    rate = ingested / (time.perf_counter() - start)
+                    log.info(f"Page {page}: {len(store)} entries, {rate:.0f}/s")
+        finally:
+            for task in pending.values():
+                task.cancel()
+
+        elapsed = time.perf_counter() - start
+        log.info(
+            f"Ingested {ingested} entries of classic league {store.league_id} "
+            f"in {elapsed:.1f}s ({ingested / elapsed:.0f} entries/s)"
+        )
+
+    @staticmethod
+    async def fpl_run_classic_ingest(store, api=None):
+        async with FPLHttpSession() as http:
+            await FPLSession.fpl_ingest_classic_league(http, api or API_THROTTLE, store)
+
+    @staticmethod
+    def ingest_classic_league(store):
+        asyncio.run(FPLSession.fpl_run_classic_ingest(store))
+
     # ------------------ FPL Session Setup ------------------
 
+    async def fpl_run_once(self, func, *args):
+        """
+        Run one coroutine for a sync wrapper: the HTTP session is opened for
+        it and closed afterwards (if owned), since asyncio.run's loop ends.
+        """
+        try:
+            await self.http.open()
+            return await func(*args)
+        finally:
+            await self.aclose()
+
     async def fpl_get_session(self):
-        self.fpl_session = FPL()
-        await self.fpl_session.login_v2(
-            email=os.environ["FPL_EMAIL"], password=os.environ["FPL_PASSWORD"]
+        await self.http.open()
+        self.fpl_session = FPL(self.http.session)
+        await self.api.call(
+            self.fpl_session.login_v2,
+            email=os.environ["FPL_EMAIL"],
+            password=os.environ["FPL_PASSWORD"],
         )
-        self.user = await self.fpl_session.get_user()
-        self.gameweeks = await self.fpl_session.get_gameweeks()
+        self.user = await self.api.call(self.fpl_session.get_user)
+        self.gameweeks = await self.api.call(self.fpl_session.get_gameweeks)
         self.set_current_gameweek()
-        self.h2h_league = await self.fpl_session.get_h2h_league(self.h2h_league_id)
-        # await self.fpl_fixtures_info()
+        self.h2h_league = await self.api.call(
+            self.fpl_session.get_h2h_league, self.h2h_league_id
+        )
 
         try:
-            self.h2h_league_all_fixtures = await self.fpl_get_fixtures()
-        except ValueError:
-            log.info("Failed to retrieve game week data, trying second method")
             try:
-                self.h2h_league_all_fixtures = await self.fpl_get_fixtures_2()
-                self.fpl_fixtures_retrieve_method = 2
-            except ValueError:
-                log.info("Failed to retrieve game week data, trying third method")
-                if not self.is_gameweek_data_checked():
-                    self.current_gameweek_data_valid = False
-                    return
-                self.h2h_league_all_fixtures = await self.fpl_get_fixtures_3()
-                self.fpl_fixtures_retrieve_method = 3
+                until = None if self.fetch_schedule else self.curr_gameweek
+                await self.fpl_get_fixtures(self.fpl_stream_fixtures(until=until))
+            except FPLApiError as err:
+                log.info(f"Paged fixture retrieval failed ({err}), using gameweeks")
+                await self.fpl_get_fixtures(self.fpl_stream_gameweek_fixtures())
+        except FixtureInProgressError as err:
+            log.info(str(err))
+            self.current_gameweek_data_valid = False
+            # Keep only settled weeks; pairings for live mode come separately.
+            self.h2h_league_fixture_map.pop(self.curr_gameweek, None)
+            self.live_fixtures = await self.api.call(
+                self.h2h_league.get_fixture, self.curr_gameweek
+            )
+            self.h2h_league_schedule = []
+            for fixture in self.live_fixtures:
+                self.add_h2h_league_schedule(fixture)
+            if self.fetch_schedule:
+                async for fixture in self.fpl_stream_fixtures():
+                    if fixture["event"] > self.curr_gameweek:
+                        self.add_h2h_league_schedule(fixture)
+            return
+        except InvalidFixtureError as err:
+            raise FPLSessionError(str(err)) from err
+
+        if not self.h2h_league_fixture_map:
+            raise FPLSessionError("Failed to retrieve H2H league fixture")
 
+        log.info(f"Retrieved {len(self.h2h_league_fixture_map)} gameweeks of fixtures")
         self.current_gameweek_data_valid = True
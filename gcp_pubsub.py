@@ -1,12 +1,12 @@
-import heapq
-from copy import deepcopy
-
 from google.cloud import pubsub_v1
 
 from logger import Logger
 
 log = Logger.getInstance().getLogger()
 
+# Places named by get_rank_str; only the leaders go in the message.
+RANKED_PLACES = 16
+
 
 class GcpPubSubClient(object):
     """[summary]
@@ -25,8 +25,10 @@ class GcpPubSubClient(object):
         # `projects/{project_id}/topics/{topic_id}`
         self.topic_path = self.publisher.topic_path(project_id, topic_id)
 
-    def publish(self, fpl_session, heap):
-        message = self.build_pubsub_message(fpl_session, heap)
+    def publish(self, fpl_session, standings, provisional=False):
+        message = self.build_pubsub_message(fpl_session, standings)
+        if provisional:
+            message = b"Provisional:" + message
         log.info("\n\n\nMessage: {}".format(message))
         self.publish_message(data=message)
 
@@ -36,19 +38,15 @@ class GcpPubSubClient(object):
         log.debug(future.result())
         log.debug("Published message to {0}".format(self.topic_path))
 
-    def build_pubsub_message(self, fpl_session, heap):
+    def build_pubsub_message(self, fpl_session, standings):
         winners = []
         losers = []
         draws = []
-        rank = 1
-        heap_copy = deepcopy(heap)
         curr_gw = fpl_session.get_current_gameweek()
         rank_str = ""
         outcome_str = ""
 
-        while heap_copy:
-            player = heapq.heappop(heap_copy).val
-
+        for player in standings:
             name = player.get_name()
             if player.is_winner(curr_gw):
                 winners.append(name)
@@ -60,8 +58,10 @@ class GcpPubSubClient(object):
                 log.error("Invalid outcome")
                 exit(2)
 
-            rank_str += ('"{0}" place {1}.').format(self.get_rank_str(rank), name)
-            rank += 1
+        for rank, player in standings.top(RANKED_PLACES):
+            rank_str += ('"{0}" place {1}.').format(
+                self.get_rank_str(rank), player.get_name()
+            )
 
         if len(winners) > 0:
             outcome_str += "Winners:"
@@ -1,12 +1,18 @@
-import heapq
-from copy import deepcopy
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import gspread
+import requests
+from gspread.utils import a1_to_rowcol, rowcol_to_a1
 from gspread_formatting import CellFormat, Color, TextFormat
 from gspread_formatting.batch_update_requests import format_cell_range
 from oauth2client.service_account import ServiceAccountCredentials
 
 from logger import Logger
+from rate_limiter import RETRY_STATUSES, RetryPolicy, TokenBucket
 
 SCOPE = [
     "https://spreadsheets.google.com/feeds",
@@ -15,17 +21,137 @@ SCOPE = [
 
 log = Logger.getInstance().getLogger()
 
+# Sheets recommends keeping request payloads under 2MB.
+MAX_REQUEST_BYTES = 2 * 1024 * 1024
+CHUNK_BYTES = 256 * 1024
+UPLOAD_CONCURRENCY = 4
+UPLOAD_ATTEMPTS = 5
+
+# Sheets allows 60 write requests per minute per user; shared by every
+# GoogleSheets object in the process.
+WRITE_BUCKET = TokenBucket(rate=1.0, capacity=5, min_rate=0.1, max_rate=1.0)
+WRITE_BUCKET_LOCK = threading.Lock()
+
+
+def estimate_row_bytes(row):
+    return len(json.dumps(row, default=str)) + 1
+
+
+def chunk_rows(rows, max_bytes=CHUNK_BYTES):
+    """
+    Split rows into consecutive (offset, rows) blocks of at most max_bytes.
+    """
+    chunks = []
+    start, size = 0, 0
+    for i, row in enumerate(rows):
+        row_bytes = estimate_row_bytes(row)
+        if i > start and size + row_bytes > max_bytes:
+            chunks.append((start, rows[start:i]))
+            start, size = i, 0
+        size += row_bytes
+    if start < len(rows):
+        chunks.append((start, rows[start:]))
+    return chunks
+
+
+def is_retryable(error):
+    """
+    Throttling, server and connection errors; anything else is permanent.
+    """
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is not None:
+        return status in RETRY_STATUSES
+    return isinstance(
+        error,
+        (
+            ConnectionError,
+            TimeoutError,
+            requests.exceptions.ConnectionError,
+            requests.exceptions.Timeout,
+        ),
+    )
+
+
+def acquire_write_token():
+    with WRITE_BUCKET_LOCK:
+        wait = WRITE_BUCKET.reserve()
+    if wait > 0:
+        time.sleep(wait)
+
 
 class GoogleSheets:
     """
     Google Sheets API object.
     """
 
-    def __init__(self, creds_fname, fname, worksheet_num=0):
+    def __init__(
+        self,
+        creds_fname,
+        fname,
+        worksheet_num=0,
+        key=None,
+        cache_fname=None,
+        cancelled=None,
+    ):
         creds = ServiceAccountCredentials.from_json_keyfile_name(creds_fname, SCOPE)
-        client = gspread.authorize(creds)
-        self.sheet = client.open(fname)
-        self.sheet_instance = self.sheet.get_worksheet(worksheet_num)
+        self.client = gspread.authorize(creds)
+        self.fname = fname
+        self.cache_fname = cache_fname
+        # threading.Event set when the caller no longer wants this client.
+        self.cancelled = cancelled
+        self.sheet = self.open_spreadsheet(key or self.load_cached_key())
+
+        # One metadata fetch for every worksheet, memoized by index and title.
+        self.worksheets = self.sheet.worksheets()
+        self.worksheets_by_title = {ws.title: ws for ws in self.worksheets}
+        self.sheet_instance = self.worksheets[worksheet_num]
+
+    # ------------------ Spreadsheet Key Cache ------------------
+
+    def open_spreadsheet(self, key):
+        if key:
+            try:
+                return self.client.open_by_key(key)
+            except gspread.exceptions.SpreadsheetNotFound:
+                pass
+            except gspread.exceptions.APIError as err:
+                # Throttling and server errors say nothing about the key.
+                if getattr(err.response, "status_code", None) != 404:
+                    raise
+            log.info(f"Cached key for '{self.fname}' is stale, searching by title")
+
+        # Drive search by title, only needed the first time.
+        sheet = self.client.open(self.fname)
+        self.save_cached_key(sheet.id)
+        return sheet
+
+    def read_key_cache(self):
+        if not self.cache_fname or not os.path.exists(self.cache_fname):
+            return {}
+        try:
+            with open(self.cache_fname, encoding="UTF-8") as file:
+                return json.load(file)
+        except ValueError:
+            log.error(f"Ignoring corrupt spreadsheet key cache {self.cache_fname}")
+            return {}
+
+    def load_cached_key(self):
+        return self.read_key_cache().get(self.fname)
+
+    def save_cached_key(self, key):
+        if not self.cache_fname:
+            return
+        if self.cancelled is not None and self.cancelled.is_set():
+            return
+        cache = self.read_key_cache()
+        cache[self.fname] = key
+        tmp = self.cache_fname + ".tmp"
+        with open(tmp, "w", encoding="UTF-8") as file:
+            json.dump(cache, file, indent=2)
+        os.replace(tmp, self.cache_fname)
+        log.info(f"Cached spreadsheet key for '{self.fname}'")
+
+    # ------------------ Worksheet Methods ------------------
 
     def search_player(self, name):
         return self.sheet_instance.find(name)
@@ -36,24 +162,153 @@ class GoogleSheets:
     def update_players_score(self, cell_list):
         self.sheet_instance.update_cells(cell_list)
 
+    def find_players(self, names):
+        """
+        Read the worksheet once; returns ({name: (row, col)}, values) with
+        1-based positions of the first cell holding each name.
+        """
+        values = self.sheet_instance.get_all_values()
+        wanted = set(names)
+        found = {}
+        for r, row in enumerate(values, start=1):
+            for c, value in enumerate(row, start=1):
+                if value in wanted and value not in found:
+                    found[value] = (r, c)
+        return found, values
+
     def update_worksheet_num(self, num):
-        self.sheet_instance = self.sheet.get_worksheet(num)
+        self.sheet_instance = self.worksheets[num]
+
+    def update_worksheet_title(self, title, rows=100, cols=26):
+        if title not in self.worksheets_by_title:
+            log.info(f"Adding worksheet '{title}'")
+            worksheet = self.sheet.add_worksheet(title=title, rows=rows, cols=cols)
+            self.worksheets.append(worksheet)
+            self.worksheets_by_title[title] = worksheet
+        self.sheet_instance = self.worksheets_by_title[title]
+
+    def replace_table(self, rows, start_cell="A1"):
+        """
+        Replace the current worksheet's values with `rows` from start_cell.
 
-    def update_rank_table(self, heap=[], start_cell="A2", data=[]):
+        Value updates cannot write past the grid, so it is grown first, and
+        the old values are cleared so a shorter table leaves nothing behind.
+        """
+        row, col = a1_to_rowcol(start_cell)
+        last_row = row + len(rows) - 1
+        last_col = col + max((len(r) for r in rows), default=1) - 1
+        worksheet = self.sheet_instance
+        if worksheet.row_count < last_row or worksheet.col_count < last_col:
+            acquire_write_token()
+            worksheet.resize(
+                rows=max(worksheet.row_count, last_row),
+                cols=max(worksheet.col_count, last_col),
+            )
+        acquire_write_token()
+        worksheet.clear()
+        self.write_rows(start_cell, rows)
+
+    def update_rank_table(self, standings=(), start_cell="A2", data=[]):
         if len(data) != 0:
-            self.sheet_instance.update(start_cell, data)
-        elif len(heap) != 0:
-            self.build_rank_table_data(heap)
-            self.sheet_instance.update(start_cell, self.ranked_data)
+            self.write_rows(start_cell, data)
+        elif len(standings) != 0:
+            self.build_rank_table_data(standings)
+            self.write_rows(start_cell, self.ranked_data)
 
-    def build_rank_table_data(self, heap):
-        self.heap = deepcopy(heap)
-        self.ranked_data = []
-        rank = 1
+    # ------------------ Chunked Writes ------------------
 
-        while self.heap:
-            player = heapq.heappop(self.heap).val
+    def chunk_range(self, start_cell, offset, rows):
+        row, col = a1_to_rowcol(start_cell)
+        width = max((len(r) for r in rows), default=1) or 1
+        first = rowcol_to_a1(row + offset, col)
+        last = rowcol_to_a1(row + offset + len(rows) - 1, col + width - 1)
+        return f"'{self.sheet_instance.title}'!{first}:{last}"
+
+    def write_batch(self, batch):
+        acquire_write_token()
+        self.sheet.values_batch_update(
+            body={
+                "valueInputOption": "RAW",
+                "data": [{"range": rng, "values": rows} for rng, rows in batch],
+            }
+        )
+
+    def write_runs(self, runs):
+        """
+        Write [(row, col, values)] horizontal runs in one batchUpdate request.
+        """
+        if not runs:
+            return
+        self.write_batch(
+            [
+                (self.chunk_range(rowcol_to_a1(row, col), 0, [values]), [values])
+                for row, col, values in runs
+            ]
+        )
+        log.info(f"Wrote {sum(len(v) for _, _, v in runs)} cells in {len(runs)} runs")
+
+    def write_rows(self, start_cell, rows, chunk_bytes=CHUNK_BYTES):
+        """
+        Write rows from start_cell in row blocks sized by estimated payload.
+
+        Blocks are packed into values.batchUpdate requests under
+        MAX_REQUEST_BYTES; a table that fits goes out in one request, larger
+        ones are uploaded concurrently and only requests that failed with a
+        retryable error are retried.
+        """
+        if not rows:
+            return
+        batches, batch, size = [], [], 0
+        for offset, chunk in chunk_rows(rows, chunk_bytes):
+            chunk_size = sum(estimate_row_bytes(r) for r in chunk)
+            if batch and size + chunk_size > MAX_REQUEST_BYTES:
+                batches.append(batch)
+                batch, size = [], 0
+            batch.append((self.chunk_range(start_cell, offset, chunk), chunk))
+            size += chunk_size
+        if batch:
+            batches.append(batch)
+
+        start = time.perf_counter()
+        retry = RetryPolicy(max_attempts=UPLOAD_ATTEMPTS)
+        pending = batches
+        for attempt in range(UPLOAD_ATTEMPTS):
+            with ThreadPoolExecutor(max_workers=UPLOAD_CONCURRENCY) as executor:
+                futures = [(b, executor.submit(self.write_batch, b)) for b in pending]
+            failed, last_error = [], None
+            for b, future in futures:
+                error = future.exception()
+                status = getattr(getattr(error, "response", None), "status_code", 0)
+                with WRITE_BUCKET_LOCK:
+                    if error is None:
+                        WRITE_BUCKET.reward()
+                        continue
+                    if status == 429:
+                        WRITE_BUCKET.penalize()
+                log.info(f"Sheets write of {len(b)} blocks failed: {error}")
+                if not is_retryable(error):
+                    raise RuntimeError("Sheets write request failed") from error
+                failed.append(b)
+                last_error = error
+            if not failed:
+                break
+            if attempt == UPLOAD_ATTEMPTS - 1:
+                raise RuntimeError(
+                    f"{len(failed)} Sheets write requests failed"
+                ) from last_error
+            pending = failed
+            time.sleep(retry.delay(attempt + 1))
+
+        elapsed = time.perf_counter() - start
+        log.info(
+            f"Wrote {len(rows)} rows in {len(batches)} requests, "
+            f"{len(rows) / elapsed:.0f} rows/s"
+        )
+
+    def build_rank_table_data(self, standings):
+        self.ranked_data = []
 
+        for rank, player in enumerate(standings, start=1):
             log.info("{0}: {1}".format(rank, player.get_name()))
             self.ranked_data.append(
                 [
@@ -66,7 +321,6 @@ class GoogleSheets:
                     rank,
                 ]
             )
-            rank += 1
 
     def reset_row_highlight(self, row):
         fmt = CellFormat(
@@ -0,0 +1,108 @@
+import aiohttp
+
+from logger import Logger
+from rate_limiter import FPLApiError, parse_retry_after
+
+log = Logger.getInstance().getLogger()
+
+CONNECTION_LIMIT = 20
+CONNECTION_LIMIT_PER_HOST = 8
+DNS_CACHE_TTL = 300  # seconds
+KEEPALIVE_TIMEOUT = 60  # seconds
+REQUEST_TIMEOUT = 30  # seconds
+
+
+class FPLHttpSession:
+    """
+    Owns the single pooled aiohttp client used by login, bootstrap and
+    fixture fetching for the lifetime of an FPL run.
+
+    aiohttp speaks HTTP/1.1 only; connection reuse comes from keep-alive
+    on the pooled connector instead of HTTP/2 multiplexing.
+    """
+
+    def __init__(
+        self,
+        limit=CONNECTION_LIMIT,
+        limit_per_host=CONNECTION_LIMIT_PER_HOST,
+        dns_cache_ttl=DNS_CACHE_TTL,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        timeout=REQUEST_TIMEOUT,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self.session = None
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.requests = 0
+
+    # ------------------ Lifecycle ------------------
+
+    async def open(self):
+        if self.session is not None and not self.session.closed:
+            return self.session
+
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            ttl_dns_cache=self.dns_cache_ttl,
+            use_dns_cache=True,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            trace_configs=[self._trace_config()],
+        )
+        return self.session
+
+    async def close(self):
+        if self.session is None or self.session.closed:
+            return
+        await self.session.close()
+        log.info(
+            f"HTTP session closed: {self.requests} requests, "
+            f"{self.connections_created} new connections (TLS handshakes), "
+            f"{self.connections_reused} reused"
+        )
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    # ------------------ Requests ------------------
+
+    async def get_json(self, url, **kwargs):
+        async with self.session.get(url, **kwargs) as response:
+            if response.status != 200:
+                raise FPLApiError(
+                    response.status,
+                    retry_after=parse_retry_after(response.headers.get("Retry-After")),
+                    url=url,
+                )
+            return await response.json()
+
+    # ------------------ Connection Stats ------------------
+
+    def _trace_config(self):
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            self.requests += 1
+
+        async def on_connection_create_end(session, ctx, params):
+            self.connections_created += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            self.connections_reused += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
@@ -0,0 +1,256 @@
+import json
+import os
+
+from logger import Logger
+
+log = Logger.getInstance().getLogger()
+
+
+def resolve_tie(fixture, season_totals):
+    """
+    (winner, loser) entries of a knockout H2HFixture.
+
+    Tiebreaks, in order: gameweek points, the winner reported by the API,
+    season total points up to this gameweek, then the lower entry id.
+    """
+    a, b = fixture.entry_1, fixture.entry_2
+    if a.points != b.points:
+        return (a.entry, b.entry) if a.points > b.points else (b.entry, a.entry)
+    if fixture.winner in (a.entry, b.entry):
+        return (a.entry, b.entry) if fixture.winner == a.entry else (b.entry, a.entry)
+    total_a, total_b = season_totals.get(a.entry, 0), season_totals.get(b.entry, 0)
+    if total_a != total_b:
+        return (a.entry, b.entry) if total_a > total_b else (b.entry, a.entry)
+    return (a.entry, b.entry) if a.entry < b.entry else (b.entry, a.entry)
+
+
+def entry_name(player_map, entry):
+    player = player_map.get(entry)
+    return player.get_name() if player else ""
+
+
+class KnockoutBracket:
+    """
+    Single-elimination bracket stored as an array-indexed binary tree.
+
+    Node 1 is the final and node i's children are 2i and 2i+1; leaves
+    size..2*size-1 hold the first-round draw. A node holds the entry that
+    won the tie below it, so advancing is a write to the parent of the two
+    siblings that met, and two entries can only meet at the lowest common
+    ancestor of their leaves, found from the XOR of the leaf indices.
+    """
+
+    def __init__(self, fname=None):
+        # Without a file name the bracket only lives for this run.
+        self.fname = fname
+        self.size = 0
+        self.tree = []
+        # Number of entries drawn under each node, for O(1) bye checks.
+        self.occupied = []
+        self.leaf = {}
+        self.round_names = {}
+        self.eliminated = {}
+        self.last_event = 0
+        self.load()
+
+    def load(self):
+        if not self.fname or not os.path.exists(self.fname):
+            return
+        with open(self.fname, encoding="UTF-8") as file:
+            data = json.load(file)
+        self.size = data["size"]
+        self.tree = data["tree"]
+        self.leaf = {self.tree[node]: node for node in data["leaves"]}
+        self.count_occupied()
+        self.round_names = {int(k): v for k, v in data["round_names"].items()}
+        self.eliminated = {e: event for e, event in data["eliminated"]}
+        self.last_event = data["last_event"]
+
+    def save(self):
+        if not self.fname:
+            return
+        tmp = self.fname + ".tmp"
+        with open(tmp, "w", encoding="UTF-8") as file:
+            json.dump(
+                {
+                    "size": self.size,
+                    "tree": self.tree,
+                    "leaves": sorted(self.leaf.values()),
+                    "round_names": self.round_names,
+                    "eliminated": list(self.eliminated.items()),
+                    "last_event": self.last_event,
+                },
+                file,
+            )
+        os.replace(tmp, self.fname)
+
+    # ------------------ Tree ------------------
+
+    def depth(self, node):
+        return node.bit_length() - 1
+
+    def round_name(self, node):
+        depth = self.depth(node)
+        return self.round_names.get(depth, f"Round {self.depth(self.size) - depth}")
+
+    def count_occupied(self):
+        self.occupied = [0] * (2 * self.size)
+        for node in self.leaf.values():
+            self.occupied[node] = 1
+        for node in range(self.size - 1, 0, -1):
+            self.occupied[node] = self.occupied[2 * node] + self.occupied[2 * node + 1]
+
+    def is_empty(self, node):
+        """
+        Whether no entry was drawn in the subtree under `node`.
+        """
+        return not self.occupied[node]
+
+    def advance(self, node, entry):
+        """
+        Put `entry` in `node`, and above it while the other side is empty.
+        """
+        self.tree[node] = entry
+        while node > 1 and self.is_empty(node ^ 1):
+            node >>= 1
+            self.tree[node] = entry
+
+    def position(self, entry):
+        """
+        Highest node `entry` has reached.
+        """
+        node = self.leaf[entry]
+        while node > 1 and self.tree[node >> 1] == entry:
+            node >>= 1
+        return node
+
+    def meeting_node(self, entry_a, entry_b):
+        leaf_a, leaf_b = self.leaf[entry_a], self.leaf[entry_b]
+        return leaf_a >> (leaf_a ^ leaf_b).bit_length()
+
+    def can_meet(self, entry_a, entry_b):
+        """
+        Whether both entries are alive and the tie between them is unplayed.
+        """
+        if entry_a == entry_b or entry_a not in self.leaf or entry_b not in self.leaf:
+            return False
+        if entry_a in self.eliminated or entry_b in self.eliminated:
+            return False
+        return self.tree[self.meeting_node(entry_a, entry_b)] is None
+
+    def alive(self):
+        return [entry for entry in self.leaf if entry not in self.eliminated]
+
+    def champion(self):
+        return self.tree[1] if self.tree else None
+
+    # ------------------ Rounds ------------------
+
+    def seed(self, fixtures):
+        """
+        Lay out the first round's draw. Leaves past the last entry are
+        empty, and an entry drawn against an empty leaf has a bye.
+        """
+        entries = [entry for f in fixtures for entry in (f.entry_1, f.entry_2)]
+        self.size = 1 << max(len(entries) - 1, 1).bit_length()
+        self.tree = [None] * (2 * self.size)
+        for i, result in enumerate(entries):
+            self.tree[self.size + i] = result.entry
+            self.leaf[result.entry] = self.size + i
+        self.count_occupied()
+        for entry, node in self.leaf.items():
+            if self.is_empty(node ^ 1):
+                self.advance(node >> 1, entry)
+
+    def play(self, fixture, season_totals):
+        winner, loser = resolve_tie(fixture, season_totals)
+        if winner not in self.leaf or loser not in self.leaf:
+            log.error(f"Knockout fixture {fixture.id} has entries outside the bracket")
+            return None
+        node_w, node_l = self.position(winner), self.position(loser)
+        if node_w ^ node_l != 1:
+            log.error(f"Knockout fixture {fixture.id} does not match the bracket")
+            return None
+        parent = node_w >> 1
+        self.advance(parent, winner)
+        self.eliminated[loser] = fixture.event
+        if fixture.knockout_name:
+            self.round_names[self.depth(parent)] = fixture.knockout_name
+        return winner
+
+    def apply(self, fixture_map, player_map):
+        """
+        Play the knockout fixtures of every gameweek after the last one
+        applied; returns [(fixture, winner)] for the ties played, in order.
+        Call save() once the results have been published.
+        """
+        played = []
+        for event in sorted(e for e in fixture_map if e > self.last_event):
+            fixtures = [f for f in fixture_map[event] if f.is_knockout]
+            if not fixtures:
+                continue
+            if not self.tree:
+                self.seed(fixtures)
+            totals = {
+                entry: sum(p for week, p in player.points.items() if week <= event)
+                for entry, player in player_map.items()
+            }
+            for fixture in fixtures:
+                winner = self.play(fixture, totals)
+                if winner is not None:
+                    played.append((fixture, winner))
+            self.last_event = event
+            log.info(f"Knockout gameweek {event}: {len(fixtures)} ties played")
+        return played
+
+    def mark_players(self, player_map):
+        """
+        Set FPLPlayer.is_knockout, and winner to the entry that won each
+        player's latest tie (their own id while they are still in).
+        """
+        for entry in self.leaf:
+            player = player_map.get(entry)
+            if player is None:
+                continue
+            player.is_knockout = True
+            node = self.position(entry)
+            if node > 1 and self.tree[node >> 1] is not None:
+                player.winner = self.tree[node >> 1]
+            elif node < self.size:
+                player.winner = entry
+
+    # ------------------ Outputs ------------------
+
+    def build_table(self, player_map):
+        """
+        Rows for the knockout worksheet: one per tie, by round.
+        """
+        def name(entry):
+            return entry_name(player_map, entry)
+
+        rows = [["Round", "Entry 1", "Entry 2", "Winner"]]
+        for depth in range(self.depth(self.size) - 1, -1, -1):
+            for node in range(1 << depth, 2 << depth):
+                left, right = self.tree[2 * node], self.tree[2 * node + 1]
+                if left is None and right is None:
+                    continue
+                winner = name(self.tree[node])
+                rows.append([self.round_name(node), name(left), name(right), winner])
+        return rows
+
+    def build_message(self, played, player_map):
+        def name(entry):
+            return entry_name(player_map, entry)
+
+        rounds = {}
+        for fixture, winner in played:
+            loser = next(e.entry for e in fixture.entries if e.entry != winner)
+            results = rounds.setdefault(fixture.knockout_name or "Knockout", [])
+            results.append(f"{name(winner)} beat {name(loser)}")
+        message = " ".join(
+            f"{round_name}: {', '.join(results)}."
+            for round_name, results in rounds.items()
+        )
+        if self.champion() is not None:
+            message += f" {name(self.champion())} wins the cup!"
+        return message
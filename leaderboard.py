@@ -0,0 +1,88 @@
+from bisect import bisect_left, insort
+
+from fpl_player import FPLPlayer
+
+# Above this share of changed entries, re-sorting everything beats moving
+# each changed entry within the sorted list.
+RESORT_FRACTION = 0.125
+
+
+class Leaderboard:
+    """
+    H2H league table kept as a sorted list of rank keys.
+
+    Keys order players by H2H points, then total points, both descending,
+    with the entry's insertion order breaking exact ties.
+    Top-k queries read a prefix of the sorted keys, so nothing re-orders the
+    whole league to answer them; applying a gameweek only moves the entries
+    whose results changed.
+    """
+
+    def __init__(self, player_map=None):
+        self.players = {}
+        self.keys = {}
+        # Players by insertion order, the last element of their rank key.
+        self.by_seq = []
+        for player in (player_map or {}).values():
+            self.track(player)
+        self.order = sorted(self.keys.values())
+
+    def track(self, player):
+        entry = player.get_id()
+        self.players[entry] = player
+        self.by_seq.append(player)
+        self.keys[entry] = self.rank_key(player, len(self.by_seq) - 1)
+
+    @staticmethod
+    def rank_key(player, seq):
+        return (-player.get_total_h2h_points(), -player.get_total_points(), seq)
+
+    def apply(self, fixtures):
+        """
+        Record H2HFixture results (e.g. one gameweek's) and re-rank the
+        entries they touch; entries seen for the first time are added.
+        """
+        changed = {}
+        for fixture in fixtures:
+            for result in fixture.entries:
+                player = self.players.get(result.entry)
+                if player is None:
+                    player = FPLPlayer(
+                        id=result.entry, name=result.player_name, team_name=result.name
+                    )
+                    self.track(player)
+                    changed[result.entry] = None
+                changed.setdefault(result.entry, self.keys[result.entry])
+                player.populate_player_stats(fixture.event, result)
+
+        for entry in changed:
+            _, _, seq = self.keys[entry]
+            self.keys[entry] = self.rank_key(self.players[entry], seq)
+
+        if len(changed) > len(self.order) * RESORT_FRACTION:
+            self.order = sorted(self.keys.values())
+            return self
+
+        for entry, old in changed.items():
+            if old is not None:
+                del self.order[bisect_left(self.order, old)]
+            insort(self.order, self.keys[entry])
+        return self
+
+    # ------------------ Queries ------------------
+
+    def player_at(self, index):
+        return self.by_seq[self.order[index][2]]
+
+    def top(self, k):
+        """
+        [(rank, player)] for the first k places.
+        """
+        return [(i + 1, self.player_at(i)) for i in range(min(k, len(self.order)))]
+
+    def __iter__(self):
+        for i in range(len(self.order)):
+            yield self.player_at(i)
+
+    def __len__(self):
+        return len(self.order)
@@ -0,0 +1,218 @@
+import json
+import os
+
+import numpy as np
+
+from fixture_pipeline import AVERAGE_ENTRY, EntryResult, H2HFixture
+from logger import Logger
+
+log = Logger.getInstance().getLogger()
+
+SQUAD_SIZE = 15
+STARTING_XI = 11
+GOALKEEPER = 1
+# Minimum players per element type (GK, DEF, MID, FWD) in a valid XI.
+FORMATION_MIN = {1: 1, 2: 3, 3: 2, 4: 1}
+# Bumped whenever the cached picks/elements layout changes.
+CACHE_VERSION = 2
+
+
+class PicksCache:
+    """
+    On-disk cache of every entry's picks for a single gameweek.
+
+    Picks cannot change once the gameweek deadline has passed, so after the
+    first poll only the live points feed needs to be requested.
+    """
+
+    def __init__(self, gameweek, fname=None):
+        self.gameweek = gameweek
+        self.fname = fname
+        self.picks = {}
+        self.elements = {}
+        self.load()
+
+    def load(self):
+        if not self.fname or not os.path.exists(self.fname):
+            return
+        with open(self.fname, encoding="UTF-8") as file:
+            data = json.load(file)
+        # Caches from another gameweek or an older layout are discarded.
+        if data.get("version") != CACHE_VERSION:
+            return
+        if data.get("gameweek") != self.gameweek:
+            return
+        self.picks = {int(k): v for k, v in data["picks"].items()}
+        self.elements = {int(k): tuple(v) for k, v in data["elements"].items()}
+
+    def save(self):
+        if not self.fname:
+            return
+        with open(self.fname, "w", encoding="UTF-8") as file:
+            json.dump(
+                {
+                    "version": CACHE_VERSION,
+                    "gameweek": self.gameweek,
+                    "picks": self.picks,
+                    "elements": self.elements,
+                },
+                file,
+            )
+
+    def missing(self, entry_ids):
+        return [entry for entry in entry_ids if entry not in self.picks]
+
+    def add_picks(self, entry_id, data):
+        picks = sorted(data["picks"], key=lambda pick: pick["position"])
+        self.picks[entry_id] = {
+            "elements": [pick["element"] for pick in picks],
+            "multipliers": [pick["multiplier"] for pick in picks],
+            "captain": next(i for i, p in enumerate(picks) if p["is_captain"]),
+            "vice": next(i for i, p in enumerate(picks) if p["is_vice_captain"]),
+            "chip": data.get("active_chip"),
+            "cost": (data.get("entry_history") or {}).get("event_transfers_cost", 0),
+            "subs": [
+                (sub["element_in"], sub["element_out"])
+                for sub in data.get("automatic_subs") or []
+            ],
+        }
+
+    def set_elements(self, elements):
+        # element id -> (element_type, team, web_name)
+        self.elements = {
+            e["id"]: (e["element_type"], e["team"], e["web_name"]) for e in elements
+        }
+
+
+class LiveGameweek:
+    """
+    Provisional entry scores for an in-progress gameweek.
+
+    Picks are held as (entries x 15) arrays of element ids, so squad points
+    are a single fancy-indexed lookup into the live points array.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.entry_ids = list(cache.picks)
+        size = max(cache.elements) + 1
+        self.element_type = np.zeros(size, dtype=np.int8)
+        self.element_team = np.zeros(size, dtype=np.int16)
+        for element, (element_type, team, _) in cache.elements.items():
+            self.element_type[element] = element_type
+            self.element_team[element] = team
+
+        picks = [cache.picks[entry] for entry in self.entry_ids]
+        self.picks = np.array([p["elements"] for p in picks], dtype=np.int32)
+        self.multipliers = np.array([p["multipliers"] for p in picks], dtype=np.int8)
+        self.captain = np.array([p["captain"] for p in picks], dtype=np.int8)
+        self.vice = np.array([p["vice"] for p in picks], dtype=np.int8)
+        self.bench_boost = np.array([p["chip"] == "bboost" for p in picks])
+        self.cost = np.array([p["cost"] for p in picks], dtype=np.int32)
+
+    def scores(self, live, fixtures):
+        """
+        Return {entry_id: provisional points} from the event live feed and
+        the gameweek's fixtures (used to tell "not played yet" from "did not
+        play").
+        """
+        size = len(self.element_type)
+        points = np.zeros(size, dtype=np.int32)
+        minutes = np.zeros(size, dtype=np.int32)
+        for element in live["elements"]:
+            if element["id"] < size:
+                points[element["id"]] = element["stats"]["total_points"]
+                minutes[element["id"]] = element["stats"]["minutes"]
+
+        team_done = self.teams_done(fixtures)
+        squad_points = points[self.picks]
+        played = minutes[self.picks] > 0
+        done = team_done[self.element_team[self.picks]]
+        did_not_play = ~played & done
+
+        multipliers = self.multipliers.astype(np.int32)
+        rows = np.nonzero(did_not_play.any(axis=1))[0]
+        for row in rows:
+            multipliers[row] = self.apply_auto_subs(
+                row, multipliers[row], played[row], did_not_play[row]
+            )
+
+        totals = (squad_points * multipliers).sum(axis=1) - self.cost
+        return dict(zip(self.entry_ids, totals.tolist()))
+
+    def teams_done(self, fixtures):
+        team_done = np.ones(int(self.element_team.max()) + 1, dtype=bool)
+        for fixture in fixtures:
+            finished = bool(fixture.get("finished_provisional"))
+            for team in (fixture["team_h"], fixture["team_a"]):
+                team_done[team] &= finished
+        return team_done
+
+    def apply_auto_subs(self, row, multipliers, played, did_not_play):
+        """
+        Captaincy transfer and automatic substitutions for one entry.
+        """
+        captain, vice = self.captain[row], self.vice[row]
+        if did_not_play[captain] and played[vice]:
+            multipliers[vice] = multipliers[captain]
+            multipliers[captain] = 0
+
+        if self.bench_boost[row]:
+            return multipliers
+
+        types = self.element_type[self.picks[row]]
+        lineup = list(range(STARTING_XI))
+        for out in range(STARTING_XI):
+            if not did_not_play[out]:
+                continue
+            for sub in range(STARTING_XI, SQUAD_SIZE):
+                if not played[sub] or sub in lineup:
+                    continue
+                if (types[out] == GOALKEEPER) != (types[sub] == GOALKEEPER):
+                    continue
+                candidate = [sub if i == out else i for i in lineup]
+                if self.is_valid_formation(types[candidate]):
+                    lineup = candidate
+                    multipliers[out] = 0
+                    multipliers[sub] = 1
+                    break
+        return multipliers
+
+    @staticmethod
+    def is_valid_formation(types):
+        counts = np.bincount(types, minlength=5)
+        return all(counts[t] >= n for t, n in FORMATION_MIN.items())
+
+
+def provisional_fixtures(gameweek, raw_fixtures, scores):
+    """
+    Build provisional H2HFixture records for the current gameweek.
+    """
+    average = round(sum(scores.values()) / len(scores)) if scores else 0
+
+    def entry_result(fixture, entry, points, other):
+        return EntryResult(
+            entry=fixture.get(f"{entry}_entry") or AVERAGE_ENTRY,
+            name=fixture[f"{entry}_name"],
+            player_name=fixture[f"{entry}_player_name"],
+            points=points,
+            win=int(points > other),
+            draw=int(points == other),
+            loss=int(points < other),
+        )
+
+    results = []
+    for fixture in raw_fixtures:
+        p1 = scores.get(fixture.get("entry_1_entry"), average)
+        p2 = scores.get(fixture.get("entry_2_entry"), average)
+        results.append(
+            H2HFixture(
+                id=fixture.get("id"),
+                event=gameweek,
+                entry_1=entry_result(fixture, "entry_1", p1, p2),
+                entry_2=entry_result(fixture, "entry_2", p2, p1),
+                is_knockout=bool(fixture.get("is_knockout")),
+                knockout_name=fixture.get("knockout_name") or "",
+            )
+        )
+    return results
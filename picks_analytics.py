@@ -0,0 +1,156 @@
+import numpy as np
+from scipy import sparse
+
+from fixture_pipeline import AVERAGE_ENTRY
+from logger import Logger
+
+log = Logger.getInstance().getLogger()
+
+# Elements owned by at most this share of the league count as differentials.
+DIFFERENTIAL_OWNERSHIP = 0.2
+TOP_ELEMENTS = 10
+
+
+class PicksAnalytics:
+    """
+    Gameweek squad analytics for every league entry.
+
+    Picks are held as entries x elements sparse matrices (owned, effective
+    multiplier, captain), so ownership and points contributions are column
+    sums and matrix-vector products.
+    """
+
+    def __init__(self, player_map, picks_cache, live, finalized=True):
+        self.gameweek = picks_cache.gameweek
+        self.elements = picks_cache.elements
+        self.entry_ids = [e for e in player_map if e != AVERAGE_ENTRY]
+        self.names = [player_map[e].get_name() for e in self.entry_ids]
+
+        size = max(self.elements) + 1
+        self.points = np.zeros(size, dtype=np.int32)
+        minutes = np.zeros(size, dtype=np.int32)
+        for element in live["elements"]:
+            if element["id"] < size:
+                self.points[element["id"]] = element["stats"]["total_points"]
+                minutes[element["id"]] = element["stats"]["minutes"]
+
+        rows, cols, multipliers, captains = [], [], [], []
+        for row, entry in enumerate(self.entry_ids):
+            picks = picks_cache.picks[entry]
+            multiplier = dict(zip(picks["elements"], picks["multipliers"]))
+            for element_in, element_out in picks.get("subs", []):
+                multiplier[element_in], multiplier[element_out] = 1, 0
+            # Captaincy passes to a vice who played once the captain did not,
+            # as in LiveGameweek.apply_auto_subs.
+            captain = picks["elements"][picks["captain"]]
+            vice = picks["elements"][picks["vice"]]
+            captain_multiplier = picks["multipliers"][picks["captain"]]
+            blanked = finalized and not minutes[captain] and captain_multiplier > 1
+            if blanked and multiplier[vice] and minutes[vice]:
+                multiplier[vice], multiplier[captain] = captain_multiplier, 0
+            for element in picks["elements"]:
+                rows.append(row)
+                cols.append(element)
+                multipliers.append(multiplier[element])
+            captains.append(picks["elements"][picks["captain"]])
+
+        shape = (len(self.entry_ids), size)
+        self.owned = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int32), (rows, cols)), shape=shape
+        )
+        self.multiplier = sparse.csr_matrix((multipliers, (rows, cols)), shape=shape)
+        self.multiplier.eliminate_zeros()
+        # Exactly one captain per entry, so row i's only column is its captain.
+        self.captain = sparse.csr_matrix(
+            (np.ones(len(captains), dtype=np.int32), (range(len(captains)), captains)),
+            shape=shape,
+        )
+        self.bench = self.owned - (self.multiplier > 0).astype(np.int32)
+
+    def name(self, element):
+        return self.elements[element][2]
+
+    def ownership(self):
+        return np.asarray(self.owned.sum(axis=0)).ravel() / len(self.entry_ids)
+
+    def effective_ownership(self):
+        return np.asarray(self.multiplier.sum(axis=0)).ravel() / len(self.entry_ids)
+
+    def entry_points(self):
+        return self.multiplier @ self.points
+
+    def bench_points(self):
+        return self.bench @ self.points
+
+    def captaincy(self):
+        """
+        [(element, number of captains, captain points)] most captained first.
+        """
+        counts = np.asarray(self.captain.sum(axis=0)).ravel()
+        order = np.argsort(-counts, kind="stable")
+        return [
+            (int(e), int(counts[e]), int(self.points[e])) for e in order if counts[e]
+        ]
+
+    def differentials(self, threshold=DIFFERENTIAL_OWNERSHIP):
+        """
+        [(element, ownership, points, owners)] for scoring low-owned players.
+        """
+        ownership = self.ownership()
+        picked = (ownership > 0) & (ownership <= threshold) & (self.points > 0)
+        owners = self.multiplier.T.tocsr()
+        result = []
+        for element in np.nonzero(picked)[0].tolist():
+            started = owners[element].indices
+            if len(started):
+                names = [self.names[i] for i in started]
+                points = int(self.points[element])
+                result.append((element, ownership[element], points, names))
+        return sorted(result, key=lambda item: item[2], reverse=True)
+
+    # ------------------ Outputs ------------------
+
+    def build_table(self):
+        """
+        Rows for the analytics worksheet: one per entry, then the most
+        effectively owned elements.
+        """
+        points, bench = self.entry_points(), self.bench_points()
+        captain_of = self.captain.indices
+        rows = [["Manager", "Points", "Bench points", "Captain"]]
+        for i, name in enumerate(self.names):
+            rows.append([name, int(points[i]), int(bench[i]), self.name(captain_of[i])])
+
+        eo = self.effective_ownership()
+        ownership = self.ownership()
+        rows.append([])
+        rows.append(["Player", "Ownership", "Effective ownership", "Points"])
+        for element in np.argsort(-eo, kind="stable")[:TOP_ELEMENTS]:
+            rows.append(
+                [
+                    self.name(element),
+                    f"{ownership[element]:.0%}",
+                    f"{eo[element]:.0%}",
+                    int(self.points[element]),
+                ]
+            )
+        return rows
+
+    def build_message(self):
+        captains = ", ".join(
+            f"{self.name(e)} ({n})" for e, n, _ in self.captaincy()[:3]
+        )
+        bench = self.bench_points()
+        worst = int(np.argmax(bench))
+        message = (
+            f"Gameweek {self.gameweek} captains: {captains}. "
+            f"Most bench points: {self.names[worst]} ({int(bench[worst])})."
+        )
+        differentials = self.differentials()
+        if differentials:
+            element, _, points, names = differentials[0]
+            message += (
+                f" Top differential: {self.name(element)} "
+                f"{points} pts for {', '.join(names)}."
+            )
+        return message
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from fixture_pipeline import AVERAGE_ENTRY
+from fpl_player import FPLPlayer
+from logger import Logger
+
+log = Logger.getInstance().getLogger()
+
+SIMULATIONS = 100000
+CHUNK_SIZE = 5000
+TOP_N = 3
+# Pseudo-observations used to shrink each entry's mean/std towards the
+# league-wide values when only a few gameweeks have been played.
+PRIOR_WEIGHT = 3
+# Combines (H2H points, total points) into one sort key, as Leaderboard ranks.
+TIEBREAK_SCALE = 100000
+# Gameweek score distribution assumed before any gameweek has been played.
+DEFAULT_MEAN = 50.0
+DEFAULT_STD = 15.0
+
+
+class SeasonModel:
+    """
+    Everything a worker process needs to simulate the rest of a season,
+    held as plain arrays so it pickles cheaply.
+    """
+
+    def __init__(self, player_map, schedule):
+        # Entries with no settled gameweek yet (e.g. during GW1) are only in
+        # the schedule; they start from zero and the league-wide prior.
+        unseen = {e for _, e1, e2 in schedule for e in (e1, e2)} - set(player_map)
+        self.entry_ids = list(player_map) + sorted(unseen)
+        index = {entry: i for i, entry in enumerate(self.entry_ids)}
+        players = [player_map.get(entry) for entry in self.entry_ids]
+
+        self.h2h_points = np.array(
+            [p.get_total_h2h_points() if p else 0 for p in players], dtype=np.int64
+        )
+        self.total_points = np.array(
+            [p.get_total_points() if p else 0 for p in players], dtype=np.int64
+        )
+        self.average = index.get(AVERAGE_ENTRY)
+        self.mean, self.std = self.estimate_scores(
+            [list(p.points.values()) if p else [] for p in players]
+        )
+
+        weeks = sorted({event for event, _, _ in schedule})
+        self.home = []
+        self.away = []
+        for week in weeks:
+            fixtures = [(e1, e2) for event, e1, e2 in schedule if event == week]
+            self.home.append(np.array([index[e1] for e1, _ in fixtures]))
+            self.away.append(np.array([index[e2] for _, e2 in fixtures]))
+
+    def estimate_scores(self, points):
+        history = [np.array(p, dtype=float) for p in points]
+        played = [h for h in history if len(h)]
+        if played:
+            pooled = np.concatenate(played)
+            league_mean, league_var = pooled.mean(), pooled.var()
+        else:
+            league_mean, league_var = DEFAULT_MEAN, DEFAULT_STD**2
+
+        mean = np.empty(len(history))
+        std = np.empty(len(history))
+        for i, h in enumerate(history):
+            n = len(h)
+            mean[i] = (h.sum() + PRIOR_WEIGHT * league_mean) / (n + PRIOR_WEIGHT)
+            var = h.var() if n else 0.0
+            std[i] = np.sqrt(
+                (n * var + PRIOR_WEIGHT * league_var) / (n + PRIOR_WEIGHT)
+            )
+        return mean, std
+
+    def simulate(self, simulations, seed_seq, top_n):
+        """
+        Simulate `simulations` seasons; return (title, top-n, last) counts.
+        """
+        rng = np.random.default_rng(seed_seq)
+        entries = len(self.entry_ids)
+        h2h = np.broadcast_to(self.h2h_points, (simulations, entries)).copy()
+        total = np.broadcast_to(self.total_points, (simulations, entries)).copy()
+
+        for home, away in zip(self.home, self.away):
+            scores = rng.normal(self.mean, self.std, size=(simulations, entries))
+            scores = np.maximum(np.rint(scores), 0).astype(np.int64)
+            if self.average is not None:
+                others = np.delete(scores, self.average, axis=1)
+                scores[:, self.average] = np.rint(others.mean(axis=1))
+
+            h, a = scores[:, home], scores[:, away]
+            h2h[:, home] += 3 * (h > a) + (h == a)
+            h2h[:, away] += 3 * (a > h) + (h == a)
+            total += scores
+
+        order = np.argsort(-(h2h * TIEBREAK_SCALE + total), axis=1, kind="stable")
+        return (
+            np.bincount(order[:, 0], minlength=entries),
+            np.bincount(order[:, :top_n].ravel(), minlength=entries),
+            np.bincount(order[:, -1], minlength=entries),
+        )
+
+
+def simulate_chunk(args):
+    model, simulations, seed_seq, top_n = args
+    return model.simulate(simulations, seed_seq, top_n)
+
+
+def project_season(
+    player_map,
+    schedule,
+    simulations=SIMULATIONS,
+    top_n=TOP_N,
+    seed=None,
+    workers=None,
+    chunk_size=CHUNK_SIZE,
+):
+    """
+    Monte Carlo projection of the final H2H table.
+
+    Returns {entry_id: (title, top-n, last-place probability)}. Seasons are
+    split into fixed-size chunks with independent seeds, so results for a
+    given seed do not depend on the number of worker processes.
+    """
+    model = SeasonModel(player_map, schedule)
+    chunks = [chunk_size] * (simulations // chunk_size)
+    if simulations % chunk_size:
+        chunks.append(simulations % chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    tasks = [(model, n, s, top_n) for n, s in zip(chunks, seeds)]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(simulate_chunk, tasks))
+    elapsed = time.perf_counter() - start
+    log.info(
+        f"Simulated {simulations} seasons ({len(model.home)} gameweeks left) in "
+        f"{elapsed:.2f}s: {simulations / elapsed:.0f} seasons/s"
+    )
+
+    title, top, last = (sum(counts) / simulations for counts in zip(*results))
+    return {
+        entry: (title[i], top[i], last[i]) for i, entry in enumerate(model.entry_ids)
+    }
+
+
+def log_projection(player_map, projection, top_n=TOP_N):
+    log.info(f"{'Player':30} {'Title':>7} {'Top ' + str(top_n):>7} {'Last':>7}")
+    ranked = sorted(projection.items(), key=lambda item: item[1], reverse=True)
+    for entry, (title, top, last) in ranked:
+        player = player_map.get(entry)
+        name = player.get_name() if player else f"Entry {entry}"
+        log.info(f"{name:30} {title:7.2%} {top:7.2%} {last:7.2%}")
+
+
+def benchmark(entries, weeks, simulations, workers, seed):
+    """
+    Throughput on a synthetic round-robin league.
+    """
+    rng = np.random.default_rng(seed)
+    player_map = {}
+    for entry in range(entries):
+        player = FPLPlayer(id=entry, name=f"Player {entry}", team_name=f"Team {entry}")
+        player.points = {w: int(p) for w, p in enumerate(rng.normal(55, 12, 10))}
+        player.total_points = sum(player.points.values())
+        player_map[entry] = player
+
+    # Circle-method round robin.
+    schedule = []
+    ids = list(player_map)
+    half = entries // 2
+    for week in range(weeks):
+        shift = week % (entries - 1)
+        rotated = ids[:1] + ids[1 + shift :] + ids[1 : 1 + shift]
+        pairs = zip(rotated[:half], reversed(rotated[half:]))
+        schedule += [(week, home, away) for home, away in pairs]
+
+    start = time.perf_counter()
+    project_season(player_map, schedule, simulations, seed=seed, workers=workers)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{entries} entries, {weeks} weeks, {simulations} seasons, "
+        f"{workers or os.cpu_count()} workers: {simulations / elapsed:.0f} seasons/s"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="H2H projection benchmark")
+    parser.add_argument("--entries", type=int, default=20)
+    parser.add_argument("--weeks", type=int, default=19)
+    parser.add_argument("--simulations", type=int, default=SIMULATIONS)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    benchmark(args.entries, args.weeks, args.simulations, args.workers, args.seed)
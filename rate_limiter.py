@@ -0,0 +1,233 @@
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import aiohttp
+
+from logger import Logger
+
+log = Logger.getInstance().getLogger()
+
+# HTTP statuses that mean "slow down / try again later".
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class FPLApiError(Exception):
+    """
+    Non-successful FPL API response.
+    """
+
+    def __init__(self, status, retry_after=None, url=None):
+        super().__init__(f"FPL API request failed with status {status}: {url}")
+        self.status = status
+        self.retry_after = retry_after
+        self.url = url
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised when the FPL API circuit breaker refuses a call.
+    """
+
+
+def parse_retry_after(value):
+    """
+    Convert a Retry-After header (seconds or HTTP date) into seconds.
+    """
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Adaptive token bucket.
+
+    The refill rate follows AIMD: it is halved on every throttling response
+    and grows back additively on successes, bounded by min_rate/max_rate.
+    Reservations are computed without awaiting, so one bucket can be shared
+    by every coroutine (and every event loop) in the process.
+    """
+
+    def __init__(
+        self, rate=4.0, capacity=8, min_rate=0.5, max_rate=20.0, increase=0.1
+    ):
+        self.rate = rate
+        self.capacity = capacity
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    def reserve(self):
+        """
+        Take one token and return how long the caller must wait for it.
+        """
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens -= 1
+        wait = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+        return max(wait, self.blocked_until - now)
+
+    async def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def block_for(self, seconds):
+        """
+        Stop handing out tokens for the given number of seconds.
+        """
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def penalize(self):
+        self.rate = max(self.min_rate, self.rate / 2)
+        log.debug(f"FPL API rate decreased to {self.rate:.2f} req/s")
+
+    def reward(self):
+        self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def scale(self, share):
+        """
+        Keep only `share` of the budget, e.g. when it is split across processes.
+        """
+        self.rate *= share
+        self.min_rate *= share
+        self.max_rate *= share
+        self.increase *= share
+        self.capacity = max(1, int(self.capacity * share))
+        self.tokens = min(self.tokens, self.capacity)
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after failure_threshold consecutive failures, then
+    half-open once reset_timeout has elapsed to let a single probe through.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+
+    def allow(self):
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            log.info("FPL API circuit half-open, probing")
+            self.state = self.HALF_OPEN
+            return True
+        return True
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            log.info("FPL API circuit closed")
+        self.failures = 0
+        self.state = self.CLOSED
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                log.error(f"FPL API circuit open after {self.failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter, honouring Retry-After.
+    """
+
+    def __init__(self, max_attempts=5, base_delay=0.5, max_delay=30.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return min(self.max_delay, retry_after)
+        backoff = min(self.max_delay, self.base_delay * (2**attempt))
+        return random.uniform(0, backoff)
+
+
+def classify_error(err):
+    """
+    Return (retryable, retry_after) for an exception raised by an API call.
+    """
+    status = getattr(err, "status", None)
+    headers = getattr(err, "headers", None) or {}
+    retry_after = getattr(err, "retry_after", None)
+    if retry_after is None:
+        retry_after = parse_retry_after(headers.get("Retry-After"))
+
+    if status is not None:
+        return status in RETRY_STATUSES, retry_after
+    if isinstance(err, (asyncio.TimeoutError, aiohttp.ClientError, ConnectionError)):
+        return True, retry_after
+    return False, None
+
+
+class FPLApiThrottle:
+    """
+    Rate limiter, retry policy and circuit breaker wrapped around FPL API calls.
+    """
+
+    def __init__(self, bucket=None, retry=None, breaker=None):
+        self.bucket = bucket or TokenBucket()
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+
+    async def call(self, func, *args, **kwargs):
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                raise CircuitOpenError("FPL API circuit is open, refusing call")
+
+            await self.bucket.acquire()
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as err:
+                retryable, retry_after = classify_error(err)
+                if not retryable:
+                    raise
+                self.bucket.penalize()
+                self.breaker.record_failure()
+                attempt += 1
+                if attempt >= self.retry.max_attempts:
+                    log.error(f"{func.__name__} failed after {attempt} attempts")
+                    raise
+                delay = self.retry.delay(attempt, retry_after)
+                if retry_after is not None:
+                    self.bucket.block_for(delay)
+                log.info(
+                    f"{func.__name__} failed ({err}), retry {attempt} in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            self.bucket.reward()
+            self.breaker.record_success()
+            return result
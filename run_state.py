@@ -0,0 +1,61 @@
+import hashlib
+import json
+import os
+
+from logger import Logger
+
+log = Logger.getInstance().getLogger()
+
+
+def content_hash(fixtures, standings):
+    """
+    Stable SHA-256 of the normalized fixtures and the ranked standings.
+
+    Both are NamedTuples/tuples of plain values, so their JSON encoding is
+    canonical once fixtures are put in a fixed order.
+    """
+    digest = hashlib.sha256()
+    for fixture in sorted(fixtures, key=lambda f: (f.event, str(f.id))):
+        digest.update(json.dumps(fixture, default=str).encode("utf-8"))
+    digest.update(json.dumps(list(standings), default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class RunState:
+    """
+    Content hash last delivered by each sink (Sheets, Pub/Sub, ...).
+
+    A sink whose input hash matches what it last delivered has nothing new
+    to write, so reruns only redo sinks that failed or whose input changed.
+    """
+
+    def __init__(self, fname=None):
+        # Without a file name the state only lives for this run.
+        self.fname = fname
+        self.sinks = {}
+        if fname and os.path.exists(fname):
+            with open(fname, encoding="UTF-8") as file:
+                self.sinks = json.load(file).get("sinks", {})
+
+    def is_delivered(self, sink, digest):
+        return self.sinks.get(sink) == digest
+
+    def mark_delivered(self, sink, digest):
+        self.sinks[sink] = digest
+        if not self.fname:
+            return
+        tmp = self.fname + ".tmp"
+        with open(tmp, "w", encoding="UTF-8") as file:
+            json.dump({"sinks": self.sinks}, file, indent=2)
+        os.replace(tmp, self.fname)
+
+    def deliver(self, sink, digest, func, *args, **kwargs):
+        """
+        Run `func` unless `sink` already delivered `digest`; record success.
+        """
+        if self.is_delivered(sink, digest):
+            log.info(f"{sink}: output unchanged since last delivery, skipping")
+            return True
+        result = func(*args, **kwargs)
+        self.mark_delivered(sink, digest)
+        return result
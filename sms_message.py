@@ -1,6 +1,4 @@
-import heapq
 import smtplib
-from copy import deepcopy
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from smtplib import (SMTPNotSupportedError, SMTPSenderRefused,
@@ -10,6 +8,9 @@ from models.logger import Logger
 
 log = Logger.getInstance().getLogger()
 
+# Text messages are short; the full table is on the rank worksheet.
+SMS_PLACES = 10
+
 
 class SMSMessage(object):
     """
@@ -70,18 +71,18 @@ class SmsNotifier(object):
                 )
             )
 
-    def send(self, fpl_session, heap):
-        message = self.build_sms_message(fpl_session, heap)
+    def send(self, fpl_session, standings):
+        message = self.build_sms_message(fpl_session, standings)
         log.debug(message)
         for sms in self.sms_messages:
             sms.send_message(body=message)
 
-    def build_sms_message(self, fpl_session, heap):
+    def build_sms_message(self, fpl_session, standings):
         """[summary]
 
         Args:
             fpl_session ([type]): [description]
-            heap ([type]): [description]
+            standings ([type]): [description]
 
         Returns:
             [type]: [description]
@@ -89,15 +90,11 @@ class SmsNotifier(object):
         winners = []
         losers = []
         draws = []
-        rank = 1
-        heap_copy = deepcopy(heap)
         curr_gw = fpl_session.get_current_gameweek()
         rank_str = ""
         outcome_str = ""
 
-        while heap_copy:
-            player = heapq.heappop(heap_copy).val
-
+        for player in standings:
             name = player.get_name()
             if player.is_winner(curr_gw):
                 winners.append(name)
@@ -109,14 +106,14 @@ class SmsNotifier(object):
                 log.error("Invalid outcome")
                 exit(2)
 
+        for rank, player in standings.top(SMS_PLACES):
             rank_str += ("{0}. {1} " "{2}-{3}-{4} (W-D-L)\n").format(
                 rank,
-                name,
+                player.get_name(),
                 player.get_total_win(),
                 player.get_total_draw(),
                 player.get_total_loss(),
             )
-            rank += 1
 
         if len(winners) > 0:
             outcome_str += "Winners this week:\n"
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from logger import Logger
+
+log = Logger.getInstance().getLogger()
+
+
+class StandingsCache:
+    """
+    Precomputed JSON responses for the league standings.
+
+    Every response body and its ETag are built once in publish(); requests
+    are a dict lookup. The snapshot is replaced as a whole, and only when a
+    new gameweek has been processed.
+    """
+
+    def __init__(self):
+        self.gameweek = None
+        self.responses = {}
+
+    def publish(self, gameweek, leaderboard):
+        if gameweek == self.gameweek:
+            return False
+
+        players = list(leaderboard)
+        documents = {
+            "/standings": {
+                "gameweek": gameweek,
+                "standings": [
+                    player_summary(player, rank)
+                    for rank, player in enumerate(players, start=1)
+                ],
+            },
+            "/gameweeks": sorted({w for p in players for w in p.points}),
+        }
+        for week in documents["/gameweeks"]:
+            documents[f"/gameweeks/{week}"] = {
+                "gameweek": week,
+                "results": [
+                    gameweek_result(player, week)
+                    for player in players
+                    if week in player.points
+                ],
+            }
+        for rank, player in enumerate(players, start=1):
+            documents[f"/players/{player.get_id()}"] = player_history(player, rank)
+
+        self.responses = {path: encode(doc) for path, doc in documents.items()}
+        self.gameweek = gameweek
+        log.info(f"Standings cache refreshed for gameweek {gameweek}")
+        return True
+
+    def get(self, path):
+        return self.responses.get(path.rstrip("/") or "/standings")
+
+
+def player_summary(player, rank):
+    return {
+        "rank": rank,
+        "id": player.get_id(),
+        "name": player.get_name(),
+        "team_name": player.get_team_name(),
+        "win": player.get_total_win(),
+        "draw": player.get_total_draw(),
+        "loss": player.get_total_loss(),
+        "h2h_points": player.get_total_h2h_points(),
+        "total_points": player.get_total_points(),
+    }
+
+
+def gameweek_result(player, week):
+    return {
+        "id": player.get_id(),
+        "name": player.get_name(),
+        "points": player.get_points(week),
+        "outcome": player.get_current_week_outcome(week).name,
+    }
+
+
+def player_history(player, rank):
+    return {
+        "id": player.get_id(),
+        "name": player.get_name(),
+        "team_name": player.get_team_name(),
+        "rank": rank,
+        "gameweeks": [gameweek_result(player, week) for week in sorted(player.points)],
+    }
+
+
+def encode(document):
+    body = json.dumps(document, separators=(",", ":")).encode("utf-8")
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    return body, etag
+
+
+class StandingsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    cache = None
+
+    def do_GET(self):
+        response = self.cache.get(self.path.split("?", 1)[0])
+        if response is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body, etag = response
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        log.debug(format % args)
+
+
+def start_server(cache, host="0.0.0.0", port=8080):
+    """
+    Serve `cache` from a background thread; returns the server.
+    """
+    handler = type("Handler", (StandingsHandler,), {"cache": cache})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    log.info(f"Serving standings on http://{host}:{port}/standings")
+    return server
@@ -0,0 +1,187 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+from logger import Logger
+
+log = Logger.getInstance().getLogger()
+
+VISIBILITY_TIMEOUT = 300  # seconds
+MAX_ATTEMPTS = 3
+# How long a gameweek that was not ready yet stays hidden before a retry.
+DEFER_DELAY = 1800  # seconds
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS work_items (
+    id INTEGER PRIMARY KEY,
+    league_id INTEGER NOT NULL,
+    gameweek INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    UNIQUE (league_id, gameweek)
+);
+CREATE TABLE IF NOT EXISTS ledger (
+    league_id INTEGER NOT NULL,
+    gameweek INTEGER NOT NULL,
+    worker TEXT NOT NULL,
+    status TEXT NOT NULL,
+    finished_at REAL NOT NULL
+);
+"""
+
+
+def worker_name():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class WorkQueue:
+    """
+    SQLite-backed queue of (league, gameweek) work items.
+
+    Workers lease an item for `visibility_timeout` seconds and keep the lease
+    alive with heartbeats; an item whose lease expires (e.g. its worker died)
+    becomes visible to other workers again. Completions and failures are
+    recorded in the ledger table.
+    """
+
+    def __init__(self, path, visibility_timeout=VISIBILITY_TIMEOUT):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        with closing(self.connect()) as db:
+            db.executescript(SCHEMA)
+
+    def connect(self):
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        return db
+
+    def enqueue(self, league_id, gameweek):
+        with closing(self.connect()) as db:
+            cursor = db.execute(
+                "INSERT OR IGNORE INTO work_items (league_id, gameweek) VALUES (?, ?)",
+                (league_id, gameweek),
+            )
+        if cursor.rowcount:
+            log.info(f"Queued league {league_id} gameweek {gameweek}")
+        return bool(cursor.rowcount)
+
+    def lease(self, worker):
+        """
+        Lease the next visible item; returns (id, league_id, gameweek) or None.
+        """
+        now = time.time()
+        db = self.connect()
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute(
+                "SELECT id, league_id, gameweek FROM work_items "
+                "WHERE ((status = 'pending' "
+                "AND (lease_expires IS NULL OR lease_expires < ?)) "
+                "OR (status = 'leased' AND lease_expires < ?)) "
+                "AND attempts < ? ORDER BY id LIMIT 1",
+                (now, now, MAX_ATTEMPTS),
+            ).fetchone()
+            if row:
+                db.execute(
+                    "UPDATE work_items SET status = 'leased', worker = ?, "
+                    "lease_expires = ?, attempts = attempts + 1 WHERE id = ?",
+                    (worker, now + self.visibility_timeout, row[0]),
+                )
+            db.execute("COMMIT")
+            return row
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        finally:
+            db.close()
+
+    def heartbeat(self, item_id, worker):
+        """
+        Extend the lease; False if the item is no longer leased by `worker`.
+        """
+        with closing(self.connect()) as db:
+            cursor = db.execute(
+                "UPDATE work_items SET lease_expires = ? "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (time.time() + self.visibility_timeout, item_id, worker),
+            )
+        return bool(cursor.rowcount)
+
+    def finish(self, item_id, worker, error=None):
+        status = "done" if error is None else "pending"
+        with closing(self.connect()) as db:
+            cursor = db.execute(
+                "UPDATE work_items SET status = CASE "
+                "WHEN ? = 'pending' AND attempts >= ? THEN 'failed' ELSE ? END, "
+                "error = ?, lease_expires = NULL "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (status, MAX_ATTEMPTS, status, error, item_id, worker),
+            )
+            if not cursor.rowcount:
+                log.error(f"Work item {item_id} is no longer leased by {worker}")
+                return
+            db.execute(
+                "INSERT INTO ledger SELECT league_id, gameweek, ?, ?, ? "
+                "FROM work_items WHERE id = ?",
+                (worker, "done" if error is None else "error", time.time(), item_id),
+            )
+
+    def defer(self, item_id, worker, delay=DEFER_DELAY):
+        """
+        Put a leased item back as pending, hidden for `delay` seconds.
+
+        For work that ran fine but had nothing to do yet (e.g. the gameweek
+        is not checked); the attempt is not counted as a failure.
+        """
+        with closing(self.connect()) as db:
+            cursor = db.execute(
+                "UPDATE work_items SET status = 'pending', lease_expires = ?, "
+                "attempts = attempts - 1 "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (time.time() + delay, item_id, worker),
+            )
+            if not cursor.rowcount:
+                log.error(f"Work item {item_id} is no longer leased by {worker}")
+                return
+            db.execute(
+                "INSERT INTO ledger SELECT league_id, gameweek, ?, 'deferred', ? "
+                "FROM work_items WHERE id = ?",
+                (worker, time.time(), item_id),
+            )
+
+    def pending(self):
+        with closing(self.connect()) as db:
+            return db.execute(
+                "SELECT COUNT(*) FROM work_items WHERE status IN ('pending', 'leased')"
+            ).fetchone()[0]
+
+
+class Heartbeat:
+    """
+    Background thread renewing a lease until stopped.
+    """
+
+    def __init__(self, queue, item_id, worker):
+        self.queue = queue
+        self.item_id = item_id
+        self.worker = worker
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        interval = self.queue.visibility_timeout / 3
+        while not self.stopped.wait(interval):
+            if not self.queue.heartbeat(self.item_id, self.worker):
+                log.error(f"Lost lease on work item {self.item_id}")
+                return
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()